@@ -1,21 +1,43 @@
 import sys
 import os
-import shlex
 import re
-from typing import List, Optional, Set, Match
+import glob
+from typing import List, Optional, Set, Match, Tuple, Callable
 
-def expand_tokens(argv: List[str], path: str) -> List[str]:
+_TOKEN_QUERIES = [
+    ("cwd", r"\$\{\{this_dir\}\}"), # ${{this_dir}}
+    ("env1", r"\$(\w+)"),           # $ENV_VAR
+    ("env2", r"\$\{(\w+)\}"),       # ${ENV_VAR}
+]
+_TOKEN_REGEX = re.compile(
+    '|'.join('(?P<%s>%s)' % pair for pair in _TOKEN_QUERIES)
+)
+
+# Same lexical rules as shlex.split(s, comments=True), which this replaces
+# because it is very slow for large files
+_ARGFILE_REGEX = re.compile(r"""
+    (?P<simple>(?<![^ \t\r\n])[^ \t\r\n'"\\\#]+)(?:[ \t\r\n]+|(?=\#)|\Z)
+    |(?P<space>[ \t\r\n]+)
+    |(?P<word>[^ \t\r\n'"\\\#]+)
+    |'(?P<single>[^']*)'
+    |"(?P<double>(?:[^"\\]|\\.)*)"
+    |\\(?P<escape>.)
+    |(?P<comment>\#[^\n]*)
+    |(?P<error>['"\\])
+""", re.VERBOSE | re.DOTALL)
+
+_DOUBLE_QUOTE_ESCAPE_REGEX = re.compile(r'\\([\\"])')
+
+_GLOB_MAGIC_REGEX = re.compile(r"[*?[]")
+
+
+def _expand_str(arg: str, path: str, escape: Callable[[str], str] = str, warn: bool = True) -> str:
     """
-    Expand environment variables in args
+    Expand environment variables in a single arg.
+    Expanded values are passed through escape()
     """
-    token_queries = [
-        ("cwd", r"\$\{\{this_dir\}\}"), # ${{this_dir}}
-        ("env1", r"\$(\w+)"),           # $ENV_VAR
-        ("env2", r"\$\{(\w+)\}"),       # ${ENV_VAR}
-    ]
-    token_regex = re.compile(
-        '|'.join('(?P<%s>%s)' % pair for pair in token_queries)
-    )
+    if "$" not in arg:
+        return arg
 
     def repl(m: Match) -> str:
         if m.lastgroup in {"env1", "env2"}:
@@ -23,16 +45,96 @@ def expand_tokens(argv: List[str], path: str) -> List[str]:
             k = m.group(m.lastindex + 1)
             v = os.environ.get(k)
             if v is None:
-                print(f"warning: environment variable '{k}' is not set", file=sys.stderr)
+                if warn:
+                    print(f"warning: environment variable '{k}' is not set", file=sys.stderr)
                 v = ""
-            return v
+            return escape(v)
         elif m.lastgroup == "cwd":
             this_dir = os.path.normpath(os.path.dirname(path))
-            return this_dir
+            return escape(this_dir)
         else:
             raise RuntimeError
 
-    return [token_regex.sub(repl, arg) for arg in argv]
+    return _TOKEN_REGEX.sub(repl, arg)
+
+
+def expand_tokens(argv: List[str], path: str) -> List[str]:
+    """
+    Expand environment variables in args
+    """
+    return [_expand_str(arg, path) for arg in argv]
+
+
+def tokenize_argfile(text: str, path: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Split the contents of an argfile into args.
+
+    Returns each arg, and a glob pattern if the arg contains unquoted glob
+    characters. Otherwise the pattern is None.
+    """
+    tokens: List[Tuple[str, Optional[str]]] = []
+
+    pieces: List[str] = []
+    quoted_pieces: Set[int] = set()
+    in_token = False
+    is_glob = False
+
+    def flush() -> None:
+        pattern = None
+        if is_glob:
+            pattern = "".join(
+                glob.escape(piece) if i in quoted_pieces else piece
+                for i, piece in enumerate(pieces)
+            )
+        tokens.append(("".join(pieces), pattern))
+
+    for m in _ARGFILE_REGEX.finditer(text):
+        kind = m.lastgroup
+        if kind == "simple" and not in_token:
+            # Fast path for the most common case: An entire unquoted arg
+            word = m.group("simple")
+            tokens.append((word, word if _GLOB_MAGIC_REGEX.search(word) else None))
+            continue
+
+        if kind in ("word", "simple"):
+            # Part of an arg that is continued, or was preceded by an escaped
+            # whitespace character
+            word = m.group(kind)
+            pieces.append(word)
+            in_token = True
+            if _GLOB_MAGIC_REGEX.search(word):
+                is_glob = True
+            if kind == "word":
+                continue
+
+        if kind in ("space", "comment", "simple"):
+            if in_token:
+                flush()
+                pieces = []
+                quoted_pieces = set()
+                in_token = False
+                is_glob = False
+            continue
+
+        if kind == "single":
+            piece = m.group("single")
+        elif kind == "double":
+            piece = _DOUBLE_QUOTE_ESCAPE_REGEX.sub(r"\1", m.group("double"))
+        elif kind == "escape":
+            piece = m.group("escape")
+        else:
+            if m.group("error") == "\\":
+                print(f"error: {path}: no escaped character after '\\' at end of file", file=sys.stderr)
+            else:
+                print(f"error: {path}: no closing quotation for {m.group('error')}", file=sys.stderr)
+            sys.exit(1)
+        quoted_pieces.add(len(pieces))
+        pieces.append(piece)
+        in_token = True
+
+    if in_token:
+        flush()
+    return tokens
 
 
 def parse_argfile(path: str) -> List[str]:
@@ -41,12 +143,29 @@ def parse_argfile(path: str) -> List[str]:
         sys.exit(1)
 
     with open(path, "r", encoding='utf-8') as f:
-        args = shlex.split(f.read(), comments=True)
-        args = expand_tokens(args, path)
-        return args
+        text = f.read()
+
+    args = []
+    for token, pattern in tokenize_argfile(text, path):
+        token = _expand_str(token, path)
+        if pattern is not None:
+            # Expand the glob. Keep the pattern as-is if nothing matched, like
+            # a shell does, so that it is reported if it was meant to be a file
+            pattern = _expand_str(pattern, path, escape=glob.escape, warn=False)
+            matches = glob.glob(pattern, recursive=True)
+            if matches:
+                args.extend(sorted(matches))
+                continue
+        args.append(token)
+    return args
 
 
-def expand_argfile(argv: List[str], _pathlist: Optional[Set[str]] = None) -> List[str]:
+def expand_argfile(argv: List[str], _pathlist: Optional[Set[str]] = None, files_read: Optional[List[str]] = None) -> List[str]:
+    """
+    Expand all -f argfiles.
+
+    If files_read is provided, the paths of all argfiles are appended to it.
+    """
     if _pathlist is None:
         _pathlist = set()
 
@@ -65,7 +184,9 @@ def expand_argfile(argv: List[str], _pathlist: Optional[Set[str]] = None) -> Lis
                 sys.exit(1)
             _pathlist.add(path)
             file_args = parse_argfile(path)
-            file_args = expand_argfile(file_args, _pathlist)
+            if files_read is not None:
+                files_read.append(path)
+            file_args = expand_argfile(file_args, _pathlist, files_read)
             _pathlist.remove(path)
             new_argv.extend(file_args)
         else:
@@ -0,0 +1,201 @@
+from typing import Any, Optional, Iterator, List, Tuple
+import os
+import gc
+import sys
+import time
+import hashlib
+import pickle
+import tempfile
+from contextlib import contextmanager
+
+from . import timing
+
+# Default limit of the total size of the cache, in megabytes
+DEFAULT_MAX_SIZE_MB = 1024
+
+# Minimum time between scans of the cache for entries to evict, in seconds
+PRUNE_INTERVAL = 3600
+
+def get_cache_dir() -> Optional[str]:
+    """
+    Get the directory that PeakRDL persists cached data in.
+
+    Returns None if caching was disabled by the user.
+    """
+    if os.environ.get("PEAKRDL_NO_CACHE"):
+        return None
+
+    if os.environ.get("PEAKRDL_CACHE_DIR"):
+        return os.path.abspath(os.environ["PEAKRDL_CACHE_DIR"])
+
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "peakrdl")
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Hash an arbitrary sequence of values into a cache key.
+
+    Values shall have a stable repr()
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(repr(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """
+    Hash the contents of a file
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    # (Un)pickling a large register model allocates millions of objects, which
+    # triggers many pointless cyclic GC passes. Pausing the GC is much faster.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def get_max_size() -> int:
+    """
+    Get the limit of the total size of the cache, in bytes
+    """
+    value = os.environ.get("PEAKRDL_CACHE_MAX_SIZE")
+    if value:
+        try:
+            return int(float(value) * 1024 * 1024)
+        except ValueError:
+            print(f"warning: ignoring invalid PEAKRDL_CACHE_MAX_SIZE: '{value}'", file=sys.stderr)
+    return DEFAULT_MAX_SIZE_MB * 1024 * 1024
+
+
+def _get_entry_path(category: str, key: str) -> Optional[str]:
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    return os.path.join(cache_dir, category, key + ".pkl")
+
+
+def load(category: str, key: str) -> Any:
+    """
+    Fetch an object from the cache.
+
+    Returns None if the entry does not exist or could not be read.
+    """
+    path = _get_entry_path(category, key)
+    if path is None:
+        return None
+
+    try:
+        with open(path, "rb") as f, _gc_paused(), timing.phase(f"cache load {category}"):
+            obj = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception: # pylint: disable=broad-exception-caught
+        # Entry is corrupt or was written by an incompatible version.
+        # Treat it as a miss
+        return None
+
+    # Entries are evicted in order of their modification time, so mark the
+    # entry as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return obj
+
+
+def store(category: str, key: str, obj: Any) -> None:
+    """
+    Save an object to the cache.
+
+    The cache is only an optimization so failures are silently ignored.
+    """
+    path = _get_entry_path(category, key)
+    if path is None:
+        return
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so that concurrent readers never
+        # see a partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, _gc_paused(), timing.phase(f"cache store {category}"):
+                pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    except Exception: # pylint: disable=broad-exception-caught
+        return
+
+    _prune_if_due(os.path.dirname(os.path.dirname(path)))
+
+
+def _prune_if_due(cache_dir: str) -> None:
+    # Scanning the whole cache is not free, so only do it periodically
+    marker_path = os.path.join(cache_dir, ".last-prune")
+    try:
+        if time.time() - os.stat(marker_path).st_mtime < PRUNE_INTERVAL:
+            return
+    except OSError:
+        pass
+
+    try:
+        with open(marker_path, "w", encoding="utf-8"):
+            pass
+    except OSError:
+        return
+    prune(get_max_size())
+
+
+def prune(max_size: int) -> None:
+    """
+    Delete the least recently used cache entries until the total size of the
+    cache is at most max_size bytes.
+
+    Temporary files left behind by interrupted writes are deleted as well.
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return
+
+    entries: List[Tuple[float, int, str]] = []
+    stale_time = time.time() - PRUNE_INTERVAL
+    for dirpath, _, filenames in os.walk(cache_dir):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                st = os.stat(path)
+                if filename.endswith(".tmp"):
+                    if st.st_mtime < stale_time:
+                        os.remove(path)
+                elif filename.endswith(".pkl"):
+                    entries.append((st.st_mtime, st.st_size, path))
+            except OSError:
+                pass
+
+    # Keep the most recently used entries
+    entries.sort(reverse=True)
+    total_size = 0
+    for _, size, path in entries:
+        total_size += size
+        if total_size > max_size:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,101 @@
+"""
+Thin client that forwards a PeakRDL invocation to a running 'peakrdl serve'
+daemon.
+
+This module is intentionally kept free of any heavy imports.
+"""
+from typing import List, Optional, Dict, Any, Tuple
+import os
+import sys
+import socket
+import struct
+import json
+import array
+
+# Request header: payload length
+_HEADER = struct.Struct("!I")
+# Response: exit code
+_RESPONSE = struct.Struct("!i")
+
+
+def recv_exactly(sock: socket.socket, n: int) -> bytes:
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed unexpectedly")
+        data += chunk
+    return data
+
+
+def send_request(sock: socket.socket, request: Dict[str, Any], fds: List[int]) -> None:
+    payload = json.dumps(request).encode("utf-8")
+    # The header carries the client's stdio file descriptors so that the
+    # server can write to them directly
+    sock.sendmsg(
+        [_HEADER.pack(len(payload))],
+        [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))]
+    )
+    sock.sendall(payload)
+
+
+def recv_request(sock: socket.socket) -> Tuple[Dict[str, Any], List[int]]:
+    fds = array.array("i")
+    header, ancdata, _, _ = sock.recvmsg(_HEADER.size, socket.CMSG_SPACE(3 * fds.itemsize))
+    for cmsg_level, cmsg_type, cmsg_data in ancdata:
+        if cmsg_level == socket.SOL_SOCKET and cmsg_type == socket.SCM_RIGHTS:
+            fds.frombytes(cmsg_data[:len(cmsg_data) - (len(cmsg_data) % fds.itemsize)])
+    header += recv_exactly(sock, _HEADER.size - len(header))
+    (length,) = _HEADER.unpack(header)
+    request = json.loads(recv_exactly(sock, length).decode("utf-8"))
+    return request, list(fds)
+
+
+def send_exit_code(sock: socket.socket, code: int) -> None:
+    sock.sendall(_RESPONSE.pack(code))
+
+
+def forward(socket_path: str, argv: List[str]) -> Optional[int]:
+    """
+    Run the command on the server.
+
+    Returns the command's exit code, or None if the server is not reachable.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        request = {
+            "argv": argv,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+        }
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            sock.connect(socket_path)
+            send_request(sock, request, [0, 1, 2])
+        except OSError:
+            return None
+
+        # The command may have already started, so it is not safe to fall back
+        # to running it locally
+        try:
+            (code,) = _RESPONSE.unpack(recv_exactly(sock, _RESPONSE.size))
+        except OSError as e:
+            print(f"error: lost connection to server: {socket_path}: {e}", file=sys.stderr)
+            return 1
+        return code
+    finally:
+        sock.close()
+
+
+def main() -> None:
+    socket_path = os.environ.get("PEAKRDL_SERVER")
+    if not socket_path:
+        print("error: PEAKRDL_SERVER is not set", file=sys.stderr)
+        sys.exit(1)
+
+    code = forward(socket_path, sys.argv[1:])
+    if code is None:
+        print(f"error: unable to connect to server: {socket_path}", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(code)
@@ -0,0 +1,265 @@
+from typing import TYPE_CHECKING, List, Dict, Callable, Optional, Tuple
+import os
+import re
+import sys
+import json
+import time
+import subprocess
+
+from ..config import schema
+from ..config.loader import tomllib
+from .. import worker
+
+if TYPE_CHECKING:
+    import argparse
+    from ..plugins.importer import ImporterPlugin
+
+
+MANIFEST_SCHEMA = schema.normalize({
+    "jobs": [{
+        "name": schema.String(),
+        "args": [schema.String()],
+        "cwd": schema.DirectoryPath(),
+        "depends_on": [schema.String()],
+    }],
+})
+
+
+class Job:
+    def __init__(self, name: str, args: List[str], cwd: Optional[str], depends_on: List[str]) -> None:
+        self.name = name
+        self.args = args
+        self.cwd = cwd
+        self.depends_on = depends_on
+
+        # One of: "ok", "failed", "skipped". None if the job has not finished
+        self.status: Optional[str] = None
+
+
+def load_manifest(path: str) -> List[Job]:
+    """
+    Read and validate a TOML or JSON job manifest.
+
+    Exits with an error if the manifest is invalid.
+    """
+    try:
+        if path.endswith(".json"):
+            with open(path, "r", encoding="utf-8") as f:
+                raw_data = json.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                raw_data = tomllib.loads(f.read())
+    except OSError as e:
+        print(f"error: unable to read job manifest: {e}", file=sys.stderr)
+        sys.exit(1)
+    except (ValueError, tomllib.TOMLDecodeError) as e:
+        print(f"{path}: error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        manifest = MANIFEST_SCHEMA.extract(raw_data, path, "manifest")
+    except schema.SchemaException as e:
+        print(f"{path}: error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    jobs: List[Job] = []
+    names = set()
+    for i, job_data in enumerate(manifest["jobs"]):
+        name = job_data["name"] or f"jobs[{i}]"
+        if name in names:
+            print(f"{path}: error: more than one job is named '{name}'", file=sys.stderr)
+            sys.exit(1)
+        names.add(name)
+        if not job_data["args"]:
+            print(f"{path}: error: job '{name}' does not specify any args", file=sys.stderr)
+            sys.exit(1)
+        jobs.append(Job(name, job_data["args"], job_data["cwd"], job_data["depends_on"]))
+
+    for job in jobs:
+        for dep in job.depends_on:
+            if dep not in names:
+                print(f"{path}: error: job '{job.name}' depends on unknown job '{dep}'", file=sys.stderr)
+                sys.exit(1)
+
+    cycle = find_cycle(jobs)
+    if cycle:
+        print(f"{path}: error: circular job dependency: {' -> '.join(cycle)}", file=sys.stderr)
+        sys.exit(1)
+
+    return jobs
+
+
+def find_cycle(jobs: List[Job]) -> Optional[List[str]]:
+    """
+    Returns the names of jobs that form a dependency cycle, if there is one
+    """
+    deps = {job.name: job.depends_on for job in jobs}
+    # 0: not visited, 1: being visited, 2: done
+    state = {name: 0 for name in deps}
+    stack: List[str] = []
+
+    def visit(name: str) -> Optional[List[str]]:
+        state[name] = 1
+        stack.append(name)
+        for dep in deps[name]:
+            if state[dep] == 1:
+                return stack[stack.index(dep):] + [dep]
+            if state[dep] == 0:
+                cycle = visit(dep)
+                if cycle:
+                    return cycle
+        stack.pop()
+        state[name] = 2
+        return None
+
+    for name in deps:
+        if state[name] == 0:
+            cycle = visit(name)
+            if cycle:
+                return cycle
+    return None
+
+
+def get_log_path(log_dir: str, job: Job) -> str:
+    return os.path.join(log_dir, re.sub(r"[^\w.-]", "_", job.name) + ".log")
+
+
+class Batch(worker.CommandRunnerSubcommand):
+    name = "batch"
+    short_desc = "run many PeakRDL commands from a job manifest in parallel"
+    long_desc = (
+        "Run the PeakRDL commands listed in a TOML or JSON job manifest. Each "
+        "job is a list of command line args, and can depend on other jobs. "
+        "Jobs run in forked worker processes as soon as the jobs they depend on "
+        "have succeeded, so that plugins are only loaded once. Jobs that "
+        "depend on a failed job are skipped."
+    )
+
+    def add_arguments(self, parser: 'argparse._ActionsContainer', importers: 'List[ImporterPlugin]') -> None:
+        parser.add_argument(
+            "manifest",
+            metavar="MANIFEST",
+            help="TOML or JSON file that lists the jobs to run"
+        )
+        parser.add_argument(
+            "-j", "--jobs",
+            dest="jobs",
+            metavar="N",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Run up to N jobs in parallel (default: number of CPUs)"
+        )
+        parser.add_argument(
+            "--log-dir",
+            dest="log_dir",
+            metavar="DIR",
+            default=None,
+            help="Write the output of each job to DIR/<job name>.log instead of the console"
+        )
+
+    def main(self, importers: 'List[ImporterPlugin]', options: 'argparse.Namespace') -> None:
+        jobs = load_manifest(options.manifest)
+        if options.log_dir:
+            os.makedirs(options.log_dir, exist_ok=True)
+
+        if hasattr(os, "fork"):
+            # Import all plugins now so that jobs do not have to
+            self.preload_plugins()
+            run_job: Callable[[Job, Optional[str]], int] = self.fork_job
+        else:
+            run_job = self.spawn_job
+            options.jobs = 1
+
+        self.schedule(jobs, max(options.jobs, 1), run_job, options.log_dir)
+
+        counts = {"ok": 0, "failed": 0, "skipped": 0}
+        for job in jobs:
+            assert job.status is not None
+            counts[job.status] += 1
+        print(f"{counts['ok']} succeeded, {counts['failed']} failed, {counts['skipped']} skipped")
+        if counts["failed"] or counts["skipped"]:
+            sys.exit(1)
+
+    def schedule(self, jobs: List[Job], n_workers: int, run_job: Callable[[Job, Optional[str]], int], log_dir: Optional[str]) -> None:
+        """
+        Run jobs in the order they are listed, as soon as all of their
+        dependencies have succeeded and a worker is available.
+
+        run_job() starts a job and returns its process ID. If the job already
+        completed, it returns 0 if it succeeded, or -1 if it failed.
+        """
+        jobs_by_name = {job.name: job for job in jobs}
+        pending = list(jobs)
+        running: Dict[int, Tuple[Job, float]] = {}
+
+        with worker.frozen_gc():
+            while pending or running:
+                for job in list(pending):
+                    dep_statuses = [jobs_by_name[dep].status for dep in job.depends_on]
+                    if any(status in ("failed", "skipped") for status in dep_statuses):
+                        pending.remove(job)
+                        self.finish_job(job, "skipped", "dependency failed")
+                    elif all(status == "ok" for status in dep_statuses) and len(running) < n_workers:
+                        pending.remove(job)
+                        start = time.perf_counter()
+                        pid = run_job(job, get_log_path(log_dir, job) if log_dir else None)
+                        if pid > 0:
+                            running[pid] = (job, start)
+                        else:
+                            self.finish_job(job, "ok" if pid == 0 else "failed", f"{time.perf_counter() - start:.2f}s")
+
+                if not running:
+                    continue
+
+                pid, wait_status = os.waitpid(-1, 0)
+                if pid not in running:
+                    continue
+                job, start = running.pop(pid)
+                duration = f"{time.perf_counter() - start:.2f}s"
+                if os.WIFEXITED(wait_status) and os.WEXITSTATUS(wait_status) == 0:
+                    self.finish_job(job, "ok", duration)
+                else:
+                    self.finish_job(job, "failed", duration)
+
+    def finish_job(self, job: Job, status: str, detail: str) -> None:
+        job.status = status
+        print(f"{status:<8} {job.name} ({detail})", flush=True)
+
+    def fork_job(self, job: Job, log_path: Optional[str]) -> int:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid != 0:
+            return pid
+
+        # Worker process
+        code = 1
+        try:
+            if log_path:
+                log = open(log_path, "w", encoding="utf-8") # pylint: disable=consider-using-with
+                os.dup2(log.fileno(), 1)
+                os.dup2(log.fileno(), 2)
+                sys.stdout = sys.stderr = log
+            if job.cwd:
+                os.chdir(job.cwd)
+            os.environ.pop("PEAKRDL_SERVER", None)
+            code = worker.run_command(self.entry_point, job.args)
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code) # pylint: disable=protected-access
+
+    def spawn_job(self, job: Job, log_path: Optional[str]) -> int:
+        # Fallback for platforms that cannot fork. Runs the job to completion
+        if log_path:
+            with open(log_path, "w", encoding="utf-8") as log:
+                result = subprocess.run(
+                    [sys.executable, "-m", "peakrdl"] + job.args,
+                    cwd=job.cwd, stdout=log, stderr=subprocess.STDOUT, check=False,
+                )
+        else:
+            result = subprocess.run(
+                [sys.executable, "-m", "peakrdl"] + job.args,
+                cwd=job.cwd, check=False,
+            )
+        return 0 if result.returncode == 0 else -1
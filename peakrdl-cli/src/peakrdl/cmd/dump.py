@@ -1,41 +1,245 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List, Tuple, Optional, Any, IO
+import sys
 import math
+import struct
+import itertools
 
-from systemrdl import RDLListener, RDLWalker
-from systemrdl.node import AddrmapNode, RegNode, FieldNode
+from systemrdl.node import AddrmapNode, AddressableNode, RegNode
 
 from ..subcommand import ExporterSubcommand
 
 if TYPE_CHECKING:
     import argparse
 
+# (name, msb, lsb, sw access)
+FieldInfo = Tuple[str, int, int, str]
 
-class DumpListener(RDLListener):
-    def __init__(self, hex_digits: int, unroll: bool, show_fields: bool) -> None:
-        self.hex_digits = hex_digits
-        self.unroll = unroll
-        self.show_fields = show_fields
 
-    def enter_Reg(self, node: RegNode) -> None:
-        if self.unroll:
-            addr = node.absolute_address
-            size = node.size
+def format_dimensions(dimensions: List[int]) -> str:
+    return "x".join(str(dim) for dim in dimensions)
+
+
+class DumpTemplate:
+    """
+    Describes a node and its descendants with just enough information to
+    compute the address and path of each array element arithmetically.
+    Each node only needs to be visited once, regardless of array size.
+    """
+    def __init__(self, node: AddressableNode, unroll: bool, show_fields: bool) -> None:
+        self.inst_name = node.inst_name
+        self.offset = node.raw_address_offset
+        # Array dimensions, if the array is not unrolled
+        self.dimensions: Optional[List[int]] = None
+
+        # Offset and path suffix of each array element
+        self.elements = [(0, "")]
+        self.size = node.size
+        if node.is_array:
+            assert node.array_dimensions is not None
+            assert node.array_stride is not None
+            if unroll:
+                self.elements = [
+                    (i * node.array_stride, "".join(f"[{idx}]" for idx in indexes))
+                    for i, indexes in enumerate(itertools.product(
+                        *(range(dim) for dim in node.array_dimensions)
+                    ))
+                ]
+            else:
+                self.elements = [(0, "".join(f"[{dim}]" for dim in node.array_dimensions))]
+                self.size = node.total_size
+                self.dimensions = node.array_dimensions
+
+        self.sw = ""
+        self.fields: List[FieldInfo] = []
+        self.children: List[DumpTemplate] = []
+        if isinstance(node, RegNode):
+            self.is_reg = True
+            self.sw = ("r" if node.has_sw_readable else "") + ("w" if node.has_sw_writable else "")
+            if show_fields:
+                self.fields = [
+                    (field.inst_name, field.msb, field.lsb, field.get_property("sw").name)
+                    for field in node.fields()
+                ]
+        else:
+            self.is_reg = False
+            for child in node.children():
+                if isinstance(child, AddressableNode):
+                    self.children.append(DumpTemplate(child, unroll, show_fields))
+
+    def get_row_count(self) -> int:
+        if self.is_reg:
+            rows = 1 + len(self.fields)
+        else:
+            rows = sum(child.get_row_count() for child in self.children)
+        return len(self.elements) * rows
+
+    def get_max_path_length(self) -> int:
+        length = len(self.inst_name) + max(len(suffix) for _, suffix in self.elements)
+        if self.is_reg:
+            field_lengths = [len(name) + 1 for name, _, _, _ in self.fields]
         else:
-            addr = node.raw_absolute_address
-            size = node.total_size
+            field_lengths = [child.get_max_path_length() + 1 for child in self.children]
+        return length + max(field_lengths, default=0)
+
+    def get_max_dims_length(self) -> int:
+        if self.is_reg:
+            if self.dimensions is None:
+                return 0
+            return len(format_dimensions(self.dimensions))
+        return max((child.get_max_dims_length() for child in self.children), default=0)
+
+    def dump(self, writer: 'DumpWriter', parent_addr: int, parent_path: str) -> None:
+        base_addr = parent_addr + self.offset
+        base_path = parent_path + self.inst_name
+        for element_offset, suffix in self.elements:
+            addr = base_addr + element_offset
+            path = base_path + suffix
+            if self.is_reg:
+                writer.write_reg(path, addr, self.size, self.dimensions, self.sw)
+                for field in self.fields:
+                    writer.write_field(path, addr, field)
+            else:
+                for child in self.children:
+                    child.dump(writer, addr, path + ".")
+
+
+class DumpWriter:
+    """
+    Base class for dump output formats
+    """
+    # Output is written in batches, since writing each row individually is
+    # much slower than formatting it
+    BATCH_SIZE = 4096
+
+    #: File mode that the output shall be opened with
+    mode = "w"
+
+    def __init__(self, f: IO[Any], template: DumpTemplate, hex_digits: int) -> None:
+        self.f = f
+        self.template = template
+        self.hex_digits = hex_digits
+        self.chunks: List[Any] = []
+
+    def write(self, chunk: Any) -> None:
+        self.chunks.append(chunk)
+        if len(self.chunks) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.chunks:
+            self.f.write(self.chunks[0][:0].join(self.chunks))
+            self.chunks.clear()
+
+    def write_header(self) -> None:
+        pass
+
+    def write_reg(self, path: str, addr: int, size: int, dimensions: Optional[List[int]], sw: str) -> None:
+        raise NotImplementedError
+
+    def write_field(self, reg_path: str, reg_addr: int, field: FieldInfo) -> None:
+        raise NotImplementedError
+
+
+class TextDumpWriter(DumpWriter):
+    def write_reg(self, path: str, addr: int, size: int, dimensions: Optional[List[int]], sw: str) -> None:
+        self.write(f"0x{addr:0{self.hex_digits}x}-0x{addr+size-1:0{self.hex_digits}x}: {path}\n")
+
+    def write_field(self, reg_path: str, reg_addr: int, field: FieldInfo) -> None:
+        name, msb, lsb, _ = field
+        self.write(f"\t[{msb}:{lsb}] {name}\n")
 
-        print(
-            f"0x{addr:0{self.hex_digits}x}-0x{addr+size-1:0{self.hex_digits}x}:",
-            node.get_path(empty_array_suffix="[{dim:d}]")
+
+# Paths only consist of identifiers, array indexes and dots, so none of the
+# text formats below need to quote or escape them.
+
+class JSONLinesDumpWriter(DumpWriter):
+    def write_reg(self, path: str, addr: int, size: int, dimensions: Optional[List[int]], sw: str) -> None:
+        dims = "null" if dimensions is None else "[" + ", ".join(str(dim) for dim in dimensions) + "]"
+        self.write(
+            f'{{"type": "reg", "path": "{path}", "address": {addr}, "size": {size}, '
+            f'"dims": {dims}, "sw": "{sw}"}}\n'
+        )
+
+    def write_field(self, reg_path: str, reg_addr: int, field: FieldInfo) -> None:
+        name, msb, lsb, sw = field
+        self.write(
+            f'{{"type": "field", "path": "{reg_path}.{name}", "address": {reg_addr}, '
+            f'"msb": {msb}, "lsb": {lsb}, "sw": "{sw}"}}\n'
         )
 
-    def enter_Field(self, node: FieldNode) -> None:
-        if not self.show_fields:
-            return
 
-        print(f"\t[{node.msb}:{node.lsb}] {node.inst_name}")
+class CSVDumpWriter(DumpWriter):
+    def write_header(self) -> None:
+        self.write("type,path,address,size,dims,msb,lsb,sw\n")
+
+    def write_reg(self, path: str, addr: int, size: int, dimensions: Optional[List[int]], sw: str) -> None:
+        dims = "" if dimensions is None else format_dimensions(dimensions)
+        self.write(f"reg,{path},{addr},{size},{dims},,,{sw}\n")
+
+    def write_field(self, reg_path: str, reg_addr: int, field: FieldInfo) -> None:
+        name, msb, lsb, sw = field
+        self.write(f"field,{reg_path}.{name},{reg_addr},,,{msb},{lsb},{sw}\n")
 
 
+class NumPyDumpWriter(DumpWriter):
+    """
+    Writes a NumPy .npy file containing a 1-D array of fixed-width records.
+    Since row count and path width are computed up-front from the template,
+    records can be streamed without buffering the whole table.
+    """
+    mode = "wb"
+
+    TYPE_REG = 0
+    TYPE_FIELD = 1
+
+    def __init__(self, f: IO[Any], template: DumpTemplate, hex_digits: int) -> None:
+        super().__init__(f, template, hex_digits)
+        self.path_width = max(template.get_max_path_length(), 1)
+        # Array dimensions are formatted the same way as in csv, such as "4x8"
+        self.dims_width = max(template.get_max_dims_length(), 1)
+        # Same layout as the header's descr, without any padding
+        self.record = struct.Struct(f"<{self.path_width}sBQQ{self.dims_width}shh3s")
+
+    def write_header(self) -> None:
+        descr = [
+            ("path", f"|S{self.path_width}"),
+            ("type", "|u1"),
+            ("address", "<u8"),
+            ("size", "<u8"),
+            ("dims", f"|S{self.dims_width}"),
+            ("msb", "<i2"),
+            ("lsb", "<i2"),
+            ("sw", "|S3"),
+        ]
+        header = f"{{'descr': {descr!r}, 'fortran_order': False, 'shape': ({self.template.get_row_count()},), }}"
+
+        # Header is padded so that the data starts on a 64-byte boundary
+        preamble_len = 10
+        header += " " * (-(preamble_len + len(header) + 1) % 64) + "\n"
+        self.write(
+            b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+        )
+
+    def write_reg(self, path: str, addr: int, size: int, dimensions: Optional[List[int]], sw: str) -> None:
+        dims = b"" if dimensions is None else format_dimensions(dimensions).encode("ascii")
+        self.write(self.record.pack(
+            path.encode("ascii"), self.TYPE_REG, addr, size, dims, -1, -1, sw.encode("ascii")
+        ))
+
+    def write_field(self, reg_path: str, reg_addr: int, field: FieldInfo) -> None:
+        name, msb, lsb, sw = field
+        self.write(self.record.pack(
+            f"{reg_path}.{name}".encode("ascii"), self.TYPE_FIELD, reg_addr, 0, b"", msb, lsb,
+            sw.encode("ascii")
+        ))
+
+
+DUMP_FORMATS = {
+    "text": TextDumpWriter,
+    "jsonl": JSONLinesDumpWriter,
+    "csv": CSVDumpWriter,
+    "npy": NumPyDumpWriter,
+}
 
 
 class Dump(ExporterSubcommand):
@@ -44,6 +248,12 @@ class Dump(ExporterSubcommand):
     generates_output_file = False
 
     def add_exporter_arguments(self, arg_group: 'argparse._ActionsContainer') -> None:
+        arg_group.add_argument(
+            "-o",
+            dest="output",
+            default=None,
+            help="Write to a file instead of stdout",
+        )
 
         arg_group.add_argument(
             "-u", "--unroll",
@@ -57,10 +267,44 @@ class Dump(ExporterSubcommand):
             action="store_true",
             help="Show fields"
         )
+        arg_group.add_argument(
+            "--format",
+            dest="format",
+            choices=list(DUMP_FORMATS.keys()),
+            default="text",
+            help="Output format. 'jsonl', 'csv' and 'npy' produce a table with "
+                "one row per register, and per field if -F is used. (default: %(default)s)"
+        )
+
 
+    def _get_output_paths(self, options: 'argparse.Namespace') -> List[str]:
+        if options.output:
+            return [options.output]
+        return []
 
     def do_export(self, top_node: AddrmapNode, options: 'argparse.Namespace') -> None:
+        writer_cls = DUMP_FORMATS[options.format]
+        if options.output:
+            if writer_cls.mode == "wb":
+                with open(options.output, "wb") as f:
+                    self.dump(top_node, options, f)
+            else:
+                with open(options.output, "w", encoding="utf-8") as f:
+                    self.dump(top_node, options, f)
+        elif writer_cls.mode == "wb":
+            sys.stdout.flush()
+            self.dump(top_node, options, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+        else:
+            self.dump(top_node, options, sys.stdout)
+
+    def dump(self, top_node: AddrmapNode, options: 'argparse.Namespace', f: IO[Any]) -> None:
         hex_digits = math.ceil(top_node.total_size.bit_length() / 4)
-        walker = RDLWalker(unroll=options.unroll)
-        listener = DumpListener(hex_digits, options.unroll, options.fields)
-        walker.walk(top_node, listener)
+
+        # Rather than walking a node for every array element, compute
+        # element addresses and paths from each array's stride
+        template = DumpTemplate(top_node, options.unroll, options.fields)
+        writer = DUMP_FORMATS[options.format](f, template, hex_digits)
+        writer.write_header()
+        template.dump(writer, 0, "")
+        writer.flush()
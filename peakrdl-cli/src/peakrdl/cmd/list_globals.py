@@ -1,6 +1,5 @@
 from typing import TYPE_CHECKING, List
 
-from systemrdl import RDLCompiler
 from systemrdl.component import Addrmap
 
 from ..subcommand import Subcommand
@@ -21,8 +20,7 @@ class ListGlobals(Subcommand):
         process_input.add_importer_arguments(parser, importers)
 
     def main(self, importers: 'List[ImporterPlugin]', options: 'argparse.Namespace') -> None:
-        rdlc = RDLCompiler()
-        process_input.process_input(rdlc, importers, options.input_files, options)
+        rdlc = process_input.compile_input(importers, options.input_files, options)
 
         for name, comp_def in rdlc.root.comp_defs.items():
             if isinstance(comp_def, Addrmap):
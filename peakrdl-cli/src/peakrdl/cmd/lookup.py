@@ -0,0 +1,206 @@
+from typing import TYPE_CHECKING, List, Tuple, Optional, Dict, Any
+import sys
+import math
+import bisect
+
+from systemrdl.node import AddrmapNode, AddressableNode, RegNode, Node
+
+from ..subcommand import ExporterSubcommand
+from .. import process_input
+
+if TYPE_CHECKING:
+    import argparse
+    from systemrdl.node import RootNode
+    from ..plugins.importer import ImporterPlugin
+
+# (end address, path, array dimensions, array stride, element size, element index)
+IndexEntry = Tuple[int, str, Optional[List[int]], int, int, Optional['AddressIndex']]
+
+_MISSING = object()
+
+
+class AddressIndex:
+    """
+    Sorted, non-overlapping address ranges of the registers within a design.
+
+    Arrays are not unrolled. Each array is a single strided range instead.
+    Arrays of regfiles or addrmaps refer to a nested index that describes the
+    contents of one element relative to the element's address.
+    """
+    def __init__(self) -> None:
+        self.starts: List[int] = []
+        self.entries: List[IndexEntry] = []
+        self.memo: Dict[int, Any] = {}
+
+    @classmethod
+    def from_node(cls, node: Node, addr: int, path_prefix: str) -> 'AddressIndex':
+        index = cls()
+        ranges: List[Tuple[int, IndexEntry]] = []
+        index._add_children(node, addr, path_prefix, ranges)
+        ranges.sort(key=lambda r: r[0])
+        index.starts = [start for start, _ in ranges]
+        index.entries = [entry for _, entry in ranges]
+        return index
+
+    def _add_children(self, node: Node, addr: int, path_prefix: str, ranges: List[Tuple[int, IndexEntry]]) -> None:
+        for child in node.children():
+            if not isinstance(child, AddressableNode):
+                continue
+            child_addr = addr + child.raw_address_offset
+            path = path_prefix + child.inst_name
+            if child.is_array:
+                assert child.array_dimensions is not None
+                assert child.array_stride is not None
+                if isinstance(child, RegNode):
+                    element_index = None
+                else:
+                    element_index = AddressIndex.from_node(child, 0, ".")
+                ranges.append((child_addr, (
+                    child_addr + child.total_size, path,
+                    child.array_dimensions, child.array_stride, child.size,
+                    element_index,
+                )))
+            elif isinstance(child, RegNode):
+                ranges.append((child_addr, (
+                    child_addr + child.size, path, None, 0, child.size, None,
+                )))
+            else:
+                # Non-array containers do not need their own level in the index
+                self._add_children(child, child_addr, path + ".", ranges)
+
+    def lookup(self, addr: int) -> Optional[Tuple[str, int]]:
+        """
+        Find the register that contains the address.
+
+        Returns the register's path and address, or None if the address is
+        not mapped to any register.
+        """
+        i = bisect.bisect_right(self.starts, addr) - 1
+        if i < 0:
+            return None
+        start = self.starts[i]
+        end, path, dimensions, stride, size, element_index = self.entries[i]
+        if addr >= end:
+            return None
+        if dimensions is None:
+            return path, start
+
+        n, offset = divmod(addr - start, stride)
+        if offset >= size:
+            # Address is in a gap between array elements
+            return None
+        element_addr = addr - offset
+
+        if len(dimensions) == 1:
+            path = f"{path}[{n}]"
+        else:
+            indexes = []
+            for dim in reversed(dimensions):
+                n, idx = divmod(n, dim)
+                indexes.append(f"[{idx}]")
+            path += "".join(reversed(indexes))
+
+        if element_index is None:
+            return path, element_addr
+
+        # All elements share the same nested index, so the same offsets are
+        # looked up repeatedly
+        result = element_index.memo.get(offset, _MISSING)
+        if result is _MISSING:
+            result = element_index.lookup(offset)
+            element_index.memo[offset] = result
+        if result is None:
+            return None
+        return path + result[0], element_addr + result[1]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Memoized results are not persisted
+        state = self.__dict__.copy()
+        del state["memo"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.memo = {}
+
+
+def build_address_index(root: 'RootNode') -> AddressIndex:
+    return AddressIndex.from_node(root, 0, "")
+
+
+class Lookup(ExporterSubcommand):
+    name = "lookup"
+    short_desc = "find which registers contain the given addresses"
+    long_desc = (
+        "Find which registers contain the given addresses. Addresses are read "
+        "from the command line, or from a file with one or more addresses per "
+        "line. Addresses can be written in any notation that Python's int() "
+        "accepts, such as 0x1000. For each address, the path of the register "
+        "that contains it is printed, followed by the byte offset within the "
+        "register if it is not 0. The index used to look up addresses is "
+        "cached, so that subsequent lookups do not need to process the design."
+    )
+    generates_output_file = False
+
+    def add_exporter_arguments(self, arg_group: 'argparse._ActionsContainer') -> None:
+        arg_group.add_argument(
+            "-a", "--address",
+            dest="addresses",
+            metavar="ADDR",
+            action="append",
+            default=[],
+            help="Address to look up. Can be specified multiple times"
+        )
+        arg_group.add_argument(
+            "--address-file",
+            dest="address_file",
+            metavar="FILE",
+            default=None,
+            help="File containing addresses to look up, or '-' to read them from stdin. "
+                "Used by default if no addresses were specified on the command line"
+        )
+
+    def main(self, importers: 'List[ImporterPlugin]', options: 'argparse.Namespace') -> None:
+        index, hex_digits = process_input.elaborate_and_derive(
+            "address_index", self.build_index,
+            importers, options.input_files, options, self.udp_definitions
+        )
+
+        tokens = self.get_address_tokens(options)
+
+        # Traces tend to access the same addresses repeatedly, so each
+        # distinct address is only looked up once
+        lines: Dict[str, str] = {}
+        for token in set(tokens):
+            try:
+                addr = int(token, 0)
+            except ValueError:
+                print(f"error: invalid address: '{token}'", file=sys.stderr)
+                sys.exit(1)
+
+            result = index.lookup(addr)
+            if result is None:
+                lines[token] = f"0x{addr:0{hex_digits}x}: (unmapped)\n"
+            elif result[1] == addr:
+                lines[token] = f"0x{addr:0{hex_digits}x}: {result[0]}\n"
+            else:
+                lines[token] = f"0x{addr:0{hex_digits}x}: {result[0]}+0x{addr - result[1]:x}\n"
+
+        for i in range(0, len(tokens), 65536):
+            sys.stdout.write("".join(map(lines.__getitem__, tokens[i:i+65536])))
+
+    @staticmethod
+    def build_index(root: 'RootNode') -> Tuple[AddressIndex, int]:
+        top = root.top
+        assert isinstance(top, AddrmapNode)
+        hex_digits = math.ceil(top.total_size.bit_length() / 4)
+        return build_address_index(root), hex_digits
+
+    def get_address_tokens(self, options: 'argparse.Namespace') -> List[str]:
+        tokens: List[str] = list(options.addresses)
+        if options.address_file == "-" or (options.address_file is None and not tokens):
+            tokens.extend(sys.stdin.read().split())
+        elif options.address_file is not None:
+            with open(options.address_file, "r", encoding="utf-8") as f:
+                tokens.extend(f.read().split())
+        return tokens
@@ -0,0 +1,145 @@
+from typing import TYPE_CHECKING, List, Dict, Tuple, Type
+import argparse
+import shlex
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from ..subcommand import Subcommand, ExporterSubcommand
+from ..plugins.exporter import LazyExporterSubcommandPlugin
+from .. import process_input
+from .. import incremental
+from .. import dependencies
+from .. import timing
+from .. import worker
+
+if TYPE_CHECKING:
+    from systemrdl.node import AddrmapNode
+    from systemrdl.udp import UDPDefinition
+    from ..plugins.importer import ImporterPlugin
+
+
+# Exports to be run by forked worker processes.
+# Workers inherit this rather than having to unpickle the design.
+_pending_exports: List[Tuple[ExporterSubcommand, 'AddrmapNode', argparse.Namespace]] = []
+
+def _run_pending_export(idx: int) -> None:
+    exporter, top_node, options = _pending_exports[idx]
+    exporter.do_export(top_node, options)
+
+
+class Multi(Subcommand):
+    name = "multi"
+    short_desc = "compile and elaborate once, then run several exporters"
+    long_desc = (
+        "Compile and elaborate the input files once, then run several exporters "
+        "on the same design. Each exporter is specified using --export, followed "
+        "by a quoted string containing the exporter's name and its own arguments. "
+        "For example: --export 'regblock -o rtl/ --cpuif apb4'"
+    )
+
+    def __init__(self, subcommands: Dict[str, Subcommand]) -> None:
+        super().__init__()
+        # Mapping of all available subcommands. Exporters are looked up from here
+        self.subcommands = subcommands
+
+    def add_arguments(self, parser: 'argparse._ActionsContainer', importers: 'List[ImporterPlugin]') -> None:
+        compiler_arg_group = parser.add_argument_group("compilation args")
+        process_input.add_rdl_compile_arguments(compiler_arg_group)
+        process_input.add_elaborate_arguments(compiler_arg_group)
+
+        process_input.add_importer_arguments(parser, importers)
+
+        multi_arg_group = parser.add_argument_group("multi args")
+        multi_arg_group.add_argument(
+            "--export",
+            dest="exports",
+            metavar="'EXPORTER [ARGS...]'",
+            action="append",
+            required=True,
+            type=self.parse_export_spec,
+            help="Exporter subcommand and its arguments. Can be specified multiple times"
+        )
+        multi_arg_group.add_argument(
+            "-j", "--jobs",
+            dest="jobs",
+            metavar="N",
+            type=int,
+            default=1,
+            help="Run up to N exporters in parallel. Requires a platform that supports fork()"
+        )
+
+        incremental.add_incremental_arguments(parser)
+        dependencies.add_depfile_arguments(parser)
+
+    def parse_export_spec(self, spec: str) -> Tuple[ExporterSubcommand, argparse.Namespace]:
+        argv = shlex.split(spec)
+        if not argv:
+            raise argparse.ArgumentTypeError("missing exporter name")
+
+        name = argv[0]
+        if name not in self.subcommands:
+            raise argparse.ArgumentTypeError(f"unknown exporter '{name}'")
+        exporter = self.subcommands[name]
+        if isinstance(exporter, LazyExporterSubcommandPlugin):
+            exporter = exporter.load()
+        if not isinstance(exporter, ExporterSubcommand):
+            raise argparse.ArgumentTypeError(f"'{name}' is not an exporter")
+        if type(exporter).do_export is ExporterSubcommand.do_export:
+            # Subcommands such as 'lookup' override main() instead
+            raise argparse.ArgumentTypeError(f"'{name}' is not an exporter")
+
+        parser = argparse.ArgumentParser(
+            prog=f"peakrdl {self.name} --export {name}",
+            description=(exporter.long_desc or exporter.short_desc),
+        )
+        exporter._add_exporter_arg_group(parser)
+        exporter_options = parser.parse_args(argv[1:])
+        return exporter, exporter_options
+
+    def _get_output_paths(self, options: 'argparse.Namespace') -> List[str]:
+        paths = []
+        for exporter, exporter_options in options.exports:
+            paths.extend(exporter._get_output_paths(exporter_options))
+        return paths
+
+    def main(self, importers: 'List[ImporterPlugin]', options: 'argparse.Namespace') -> None:
+        # Elaborate using the UDPs of all exporters
+        udp_definitions: Dict[str, Type[UDPDefinition]] = {}
+        for exporter, _ in options.exports:
+            for udp in exporter.udp_definitions:
+                udp_definitions.setdefault(udp.name, udp)
+
+        root = process_input.elaborate_input(
+            importers, options.input_files, options, list(udp_definitions.values())
+        )
+
+        exports = []
+        for exporter, exporter_options in options.exports:
+            # Exporters see the common compile options as well as their own
+            merged_options = argparse.Namespace(**vars(options))
+            for k, v in vars(exporter_options).items():
+                setattr(merged_options, k, v)
+            exports.append((exporter, root.top, merged_options))
+
+        jobs = min(options.jobs, len(exports))
+        if jobs > 1 and "fork" in multiprocessing.get_all_start_methods():
+            self.run_parallel(exports, jobs)
+        else:
+            for exporter, top_node, exporter_options in exports:
+                with timing.phase(f"export {exporter.name}"):
+                    exporter.do_export(top_node, exporter_options)
+
+    def run_parallel(self, exports: List[Tuple[ExporterSubcommand, 'AddrmapNode', argparse.Namespace]], jobs: int) -> None:
+        _pending_exports[:] = exports
+
+        try:
+            with worker.frozen_gc(), ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("fork")) as executor:
+                futures = [
+                    executor.submit(_run_pending_export, idx)
+                    for idx in range(len(exports))
+                ]
+                # Propagate the first failure, in the order exporters were specified
+                for future in futures:
+                    future.result()
+        finally:
+            _pending_exports.clear()
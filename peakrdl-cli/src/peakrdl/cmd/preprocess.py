@@ -1,23 +1,54 @@
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Dict, Optional
+import os
+import re
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 from systemrdl import RDLCompiler
 
 from ..subcommand import Subcommand
-from ..process_input import parse_defines
+from ..process_input import parse_defines, preprocess_file, _MessageMonitor
+from .. import dependencies
 
 if TYPE_CHECKING:
     import argparse
     from ..plugins.importer import ImporterPlugin
 
+
+def _preprocess_to_file(path: str, output_path: str, incdirs: Optional[List[str]], defines: Dict[str, str]) -> List[str]:
+    """
+    Preprocess a file and write the result.
+
+    Returns the paths of all files that were read.
+    """
+    rdlc = RDLCompiler(message_printer=_MessageMonitor())
+    text, included_files = preprocess_file(rdlc, path, incdirs, defines)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return [path] + included_files
+
+
 class Preprocess(Subcommand):
     name = "preprocess"
     short_desc = "Preprocess SystemRDL and write the result to a file"
+    long_desc = (
+        "Preprocess one or more SystemRDL files. If more than one file is "
+        "given, the output path is a directory that the preprocessed files "
+        "are written to using their original file names. Alternatively, the "
+        "output path can be a template containing '{name}' or '{stem}', which "
+        "are replaced by each input file's name with and without its extension."
+    )
+
+    _uses_importers = False
 
     def add_arguments(self, parser: 'argparse._ActionsContainer', importers: 'List[ImporterPlugin]') -> None:
         grp = parser.add_argument_group("preprocessor args")
         grp.add_argument(
-            "file",
-            help="SystemRDL file to preprocess"
+            "files",
+            metavar="FILE",
+            nargs="+",
+            help="SystemRDL files to preprocess"
         )
         grp.add_argument(
             "-I",
@@ -38,12 +69,60 @@ class Preprocess(Subcommand):
             "-o",
             dest="output",
             required=True,
-            help="Output path",
+            help="Output path, output directory, or output path template",
         )
+        grp.add_argument(
+            "-j", "--jobs",
+            dest="jobs",
+            metavar="N",
+            type=int,
+            default=1,
+            help="Preprocess up to N files in parallel. Requires a platform that supports fork()"
+        )
+        dependencies.add_depfile_arguments(grp)
+
+    def get_output_path(self, options: 'argparse.Namespace', path: str) -> str:
+        name = os.path.basename(path)
+        if "{name}" in options.output or "{stem}" in options.output:
+            # Other braces in the path are kept as-is
+            fields = {"name": name, "stem": os.path.splitext(name)[0]}
+            return re.sub(r"\{(name|stem)\}", lambda m: fields[m.group(1)], options.output)
+        if len(options.files) == 1:
+            return options.output
+        return os.path.join(options.output, name)
+
+    def _get_output_paths(self, options: 'argparse.Namespace') -> List[str]:
+        return [self.get_output_path(options, path) for path in options.files]
 
     def main(self, importers: 'List[ImporterPlugin]', options: 'argparse.Namespace') -> None:
         rdlc = RDLCompiler()
         defines = parse_defines(rdlc, options.defines)
-        f_info = rdlc.preprocess_file(options.file, options.incdirs, defines=defines)
-        with open(options.output, 'w', encoding='utf-8') as f:
-            f.write(f_info.preprocessed_text)
+
+        output_paths = self._get_output_paths(options)
+        if len(set(output_paths)) != len(output_paths):
+            print(
+                "error: more than one input file would be written to the same output path. "
+                "Use an output path template, such as 'out/{stem}_pp.rdl'",
+                file=sys.stderr
+            )
+            sys.exit(1)
+        for output_path in output_paths:
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+        jobs = min(options.jobs, len(options.files))
+        if jobs > 1 and "fork" in multiprocessing.get_all_start_methods():
+            with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("fork")) as executor:
+                futures = [
+                    executor.submit(_preprocess_to_file, path, output_path, options.incdirs, defines)
+                    for path, output_path in zip(options.files, output_paths)
+                ]
+                # Propagate the first failure, in the order files were specified
+                for future in futures:
+                    dependencies.add_dependencies(future.result())
+        else:
+            for path, output_path in zip(options.files, output_paths):
+                dependencies.add_dependencies(
+                    _preprocess_to_file(path, output_path, options.incdirs, defines)
+                )
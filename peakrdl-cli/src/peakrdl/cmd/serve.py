@@ -0,0 +1,139 @@
+from typing import TYPE_CHECKING, List, Any
+import os
+import sys
+import socket
+import signal
+import struct
+
+from .. import client
+from .. import worker
+
+if TYPE_CHECKING:
+    import argparse
+    from ..plugins.importer import ImporterPlugin
+
+
+class Serve(worker.CommandRunnerSubcommand):
+    name = "serve"
+    short_desc = "run a server that executes PeakRDL commands with all plugins preloaded"
+    long_desc = (
+        "Run a server that listens on a UNIX socket and executes PeakRDL "
+        "commands on behalf of clients. All plugins are imported once up-front "
+        "so that each command does not pay their startup cost again. "
+        "Any invocation of peakrdl is forwarded to the server if the "
+        "PEAKRDL_SERVER environment variable is set to the socket's path."
+    )
+
+    def add_arguments(self, parser: 'argparse._ActionsContainer', importers: 'List[ImporterPlugin]') -> None:
+        parser.add_argument(
+            "--socket",
+            dest="socket",
+            required=True,
+            help="Path of the UNIX socket to listen on"
+        )
+
+    def main(self, importers: 'List[ImporterPlugin]', options: 'argparse.Namespace') -> None:
+        if not hasattr(socket, "AF_UNIX") or not hasattr(os, "fork"):
+            print("error: serve is not supported on this platform", file=sys.stderr)
+            sys.exit(1)
+
+        # Import all plugins now so that requests do not have to
+        self.preload_plugins()
+
+        if os.path.exists(options.socket):
+            # Only remove the socket if it was left behind by a dead server
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                try:
+                    sock.connect(options.socket)
+                except OSError:
+                    os.remove(options.socket)
+                else:
+                    print(f"error: a server is already listening on {options.socket}", file=sys.stderr)
+                    sys.exit(1)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(options.socket)
+        # Requests run with the server's privileges, so only its owner may
+        # connect. Nobody can connect before listen() is called
+        os.chmod(options.socket, 0o600)
+        server.listen()
+        # Periodically wake up to reap finished requests
+        server.settimeout(1.0)
+        print(f"peakrdl server listening on {options.socket}", file=sys.stderr)
+
+        # Shut down cleanly when terminated
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+        try:
+            while True:
+                self.reap_requests()
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+
+                if not is_same_user(conn):
+                    print("warning: rejected a connection from another user", file=sys.stderr)
+                    conn.close()
+                    continue
+
+                sys.stdout.flush()
+                sys.stderr.flush()
+                if os.fork() == 0:
+                    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    server.close()
+                    self.handle_request(conn)
+                conn.close()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            os.remove(options.socket)
+
+    def reap_requests(self) -> None:
+        try:
+            while os.waitpid(-1, os.WNOHANG)[0] != 0:
+                pass
+        except ChildProcessError:
+            pass
+
+    def handle_request(self, conn: socket.socket) -> None:
+        """
+        Executes the request in a forked process, then exits
+        """
+        conn.settimeout(None)
+        code = 1
+        try:
+            request, fds = client.recv_request(conn)
+
+            # Take over the client's stdio
+            for i, fd in enumerate(fds):
+                os.dup2(fd, i)
+                os.close(fd)
+            os.chdir(request["cwd"])
+            os.environ.clear()
+            os.environ.update(request["env"])
+            os.environ.pop("PEAKRDL_SERVER", None)
+
+            code = worker.run_command(self.entry_point, request["argv"])
+            client.send_exit_code(conn, code)
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+
+def _raise_keyboard_interrupt(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+def is_same_user(conn: socket.socket) -> bool:
+    """
+    Check whether the peer of a UNIX socket connection runs as the same user
+    as this process.
+    """
+    if not hasattr(socket, "SO_PEERCRED"):
+        # Not available on this platform. Rely on the socket's permissions
+        return True
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("iII"))
+    _, uid, _ = struct.unpack("iII", creds)
+    return uid == os.getuid()
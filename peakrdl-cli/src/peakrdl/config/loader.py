@@ -1,8 +1,11 @@
 from typing import Optional, Any, Dict
 import os
 import sys
+import inspect
 
 from . import schema
+from .. import cache
+from ..__about__ import __version__
 
 if sys.version_info[0:2] < (3, 11):
     # Prior to py3.11, tomllib is a 3rd party package
@@ -12,28 +15,115 @@ else:
     import tomllib
 
 class AppConfig:
-    def __init__(self, path: str, raw_data: Dict[str, Any]) -> None:
+    def __init__(self, path: str, raw_data: Dict[str, Any], snapshot_key: Optional[str] = None) -> None:
         self.path = path
         self.raw_data = raw_data
 
+        # Identifies the version of the config file that raw_data was read from.
+        # Validated namespaces are only cached if this is known
+        self.snapshot_key = snapshot_key
+
         sch = schema.normalize({
             "plugins": {
-                "importers": {"*": schema.PythonObjectImport()},
-                "exporters": {"*": schema.PythonObjectImport()},
+                "importers": {"*": schema.PythonObjectImport(lazy=True)},
+                "exporters": {"*": schema.PythonObjectImport(lazy=True)},
             },
         })
         self.peakrdl_cfg = self.get_namespace("peakrdl", sch)
 
-    def get_namespace(self, name: str, sch: schema.Schema) -> Dict[str, Any]:
+    def get_namespace(self, name: str, sch: schema.Schema, owner: Any = None) -> Dict[str, Any]:
+        """
+        Extract and validate a namespace of the config.
+
+        ``owner`` is the plugin or subcommand object that the namespace belongs
+        to. Cached results are not reused if its code changed.
+        """
         data = self.raw_data.get(name, {})
+
+        # Validating a namespace can be slow if it checks paths or imports
+        # objects. Namespaces that were not specified are cheap to fill in
+        # with defaults
+        key = None
+        if self.snapshot_key is not None and name in self.raw_data:
+            key = cache.make_key(
+                self.snapshot_key, name, _get_schema_fingerprint(sch),
+                _get_owner_fingerprint(owner)
+            )
+            cfg = cache.load("cfg_namespace", key)
+            if cfg is not None:
+                return cfg
+
         try:
             cfg = sch.extract(data, self.path, name)
         except schema.SchemaException as e:
             print(f"{self.path}: error: {str(e)}")
             sys.exit(1)
+
+        if key is not None:
+            cache.store("cfg_namespace", key, cfg)
         return cfg
 
 
+def _get_schema_fingerprint(sch: Any) -> Any:
+    """
+    Describe a schema's structure using only values that have a stable repr()
+    """
+    if isinstance(sch, schema.Schema):
+        return (type(sch).__module__, type(sch).__qualname__, _get_schema_fingerprint(vars(sch)))
+    if isinstance(sch, dict):
+        return tuple((k, _get_schema_fingerprint(v)) for k, v in sch.items())
+    if isinstance(sch, (list, tuple)):
+        return tuple(_get_schema_fingerprint(v) for v in sch)
+    # Anything else is expected to be a plain value. If it is not, its repr()
+    # will differ each run, and the namespace is never found in the cache
+    return sch
+
+
+def _get_owner_fingerprint(owner: Any) -> Any:
+    """
+    Identify the code that extracts a namespace. Installed plugins are
+    identified by their distribution's version. Otherwise, use the state of the
+    file that defines the owner's class
+    """
+    if owner is None:
+        return None
+    dist_version = getattr(owner, "dist_version", None)
+    if dist_version:
+        return (getattr(owner, "dist_name", None), dist_version)
+    try:
+        path = inspect.getabsfile(type(owner))
+        st = os.stat(path)
+    except (TypeError, OSError):
+        # Unknown origin. Use the object's repr() so that it is never found in
+        # the cache
+        return repr(owner)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def _get_snapshot_key(path: str) -> Optional[str]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    # Paths in the config file that start with '~' depend on the user's home directory
+    return cache.make_key(
+        __version__, os.path.abspath(path), st.st_mtime_ns, st.st_size,
+        os.path.expanduser("~"),
+    )
+
+
+def load_object(handle: schema.PythonObjectHandle) -> Any:
+    """
+    Import an object that was specified in a config file.
+    Errors are reported the same way as any other error in the config file.
+    """
+    try:
+        return handle.load()
+    except schema.SchemaException as e:
+        print(f"{handle.path}: error: {str(e)}")
+        sys.exit(1)
+
+
 def _discover_cfg_file() -> Optional[str]:
     """
     Discover a PeakRDL TOML config file
@@ -90,6 +180,8 @@ def load_cfg(path: Optional[str]) -> AppConfig:
         # try to discover it elsewhere
         path = _discover_cfg_file()
 
+    snapshot_key = None
+    search_paths = None
     if path is None:
         # Nope. Still no config file. Provide empty data
         raw_data = {}
@@ -99,20 +191,35 @@ def load_cfg(path: Optional[str]) -> AppConfig:
         if not os.path.isfile(path):
             raise ValueError(f"error: invalid config file path: {path}")
 
-        with open(path, 'r', encoding='utf-8') as f:
-            s = f.read()
+        # Reuse the contents of the file from a previous run if it did not change
+        snapshot_key = _get_snapshot_key(path)
+        snapshot = None
+        if snapshot_key is not None:
+            snapshot = cache.load("cfg", snapshot_key)
+
+        if snapshot is not None:
+            raw_data, search_paths = snapshot
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                s = f.read()
+            try:
+                raw_data = tomllib.loads(s)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"{path}: error: {str(e)}") from e
+
+    if search_paths is None:
+        # Do a first-pass extraction to fetch additional entries to be added to PYTHONPATH
         try:
-            raw_data = tomllib.loads(s)
-        except tomllib.TOMLDecodeError as e:
-            raise ValueError(f"{path}: error: {str(e)}") from e
+            tmp = BOOTSTRAP_SCHEMA.extract(raw_data, path, "")
+        except schema.SchemaException as e:
+            print(f"{path}: error: {str(e)}")
+            sys.exit(1)
+        search_paths = tmp['peakrdl']['python_search_paths']
 
-    # Do a first-pass extraction to fetch additional entries to be added to PYTHONPATH
-    try:
-        tmp = BOOTSTRAP_SCHEMA.extract(raw_data, path, "")
-    except schema.SchemaException as e:
-        print(f"{path}: error: {str(e)}")
-        sys.exit(1)
-    for spath in tmp['peakrdl']['python_search_paths']:
+        if snapshot_key is not None:
+            cache.store("cfg", snapshot_key, (raw_data, search_paths))
+
+    for spath in search_paths:
         sys.path.append(spath)
 
-    return AppConfig(path, raw_data)
+    return AppConfig(path, raw_data, snapshot_key)
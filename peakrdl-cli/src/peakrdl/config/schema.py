@@ -1,8 +1,9 @@
-from typing import Any, List, Dict, Union
+from typing import Any, List, Dict, Union, Optional, Tuple
 import datetime
 import os
 import re
 import importlib
+import importlib.util
 
 class SchemaException(Exception):
     """
@@ -229,31 +230,96 @@ class DirectoryPath(Path):
             raise SchemaException(f"{err_ctx}: Path does not point to a directory: {s}")
         return s
 
+class PythonObjectHandle:
+    """
+    Reference to a Python object that was specified in a config file.
+
+    The object is not imported until :meth:`load` is first called.
+    """
+    def __init__(self, module_name: str, object_name: str, path: str, err_ctx: str) -> None:
+        self.module_name = module_name
+        self.object_name = object_name
+
+        #: Path of the config file that specified the object
+        self.path = path
+
+        self.err_ctx = err_ctx
+        self._obj: Any = None
+        self._loaded = False
+
+    @property
+    def value(self) -> str:
+        """
+        The object's import spec. For example: ``"my.module.path:ObjectName"``
+        """
+        return f"{self.module_name}:{self.object_name}"
+
+    def load(self) -> Any:
+        """
+        Import the object.
+
+        Raises a :class:`SchemaException` that names the config entry that
+        specified the object if it cannot be imported.
+        """
+        if self._loaded:
+            return self._obj
+
+        try:
+            module = importlib.import_module(self.module_name)
+        except ModuleNotFoundError as e:
+            raise SchemaException(f"{self.err_ctx}: {str(e)}") from e
+
+        try:
+            self._obj = getattr(module, self.object_name)
+        except AttributeError as e:
+            raise SchemaException(f"{self.err_ctx}: {str(e)}") from e
+
+        self._loaded = True
+        return self._obj
+
+    def get_module_state(self) -> Optional[Tuple[str, int, int]]:
+        """
+        Get the path, modification time and size of the file that defines the
+        object's module, without importing it.
+
+        Returns None if the module cannot be found.
+        """
+        try:
+            spec = importlib.util.find_spec(self.module_name)
+        except (ImportError, ValueError):
+            return None
+        if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+            return None
+        st = os.stat(spec.origin)
+        return (spec.origin, st.st_mtime_ns, st.st_size)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.value}>"
+
+
 class PythonObjectImport(String):
     """
     Matches a string that specifies a Python object to import.
     For example: ``"my.module.path:ObjectName"``
+
+    If ``lazy`` is set, only the string's syntax is checked. The extracted
+    value is a :class:`PythonObjectHandle`, and the object is not imported
+    until the handle is loaded.
     """
+    def __init__(self, lazy: bool = False) -> None:
+        super().__init__()
+        self.lazy = lazy
+
     def extract(self, data: Any, path: str, err_ctx: str) -> Any:
         s = super().extract(data, path, err_ctx)
         m = re.fullmatch(r"(\w+(?:\.\w+)*):(\w+)", s)
         if not m:
             raise SchemaException(f"{err_ctx}: Invalid object import spec: {s}")
 
-        module_name = m.group(1)
-        object_name = m.group(2)
-
-        try:
-            module = importlib.import_module(module_name)
-        except ModuleNotFoundError as e:
-            raise SchemaException(f"{err_ctx}: {str(e)}") from e
-
-        try:
-            cls = getattr(module, object_name)
-        except AttributeError as e:
-            raise SchemaException(f"{err_ctx}: {str(e)}") from e
-
-        return cls
+        handle = PythonObjectHandle(m.group(1), m.group(2), path, err_ctx)
+        if self.lazy:
+            return handle
+        return handle.load()
 
 class Choice(String):
     """
@@ -0,0 +1,116 @@
+from typing import TYPE_CHECKING, List, Optional, Iterable, Set
+
+if TYPE_CHECKING:
+    import argparse
+
+# Files that the currently running command has read, in the order they were
+# first read. None if dependencies are not being tracked.
+_dependencies: Optional[List[str]] = None
+# Same files, for fast lookup
+_dependency_set: Set[str] = set()
+# Paths that were searched for but did not exist. If any of them is created,
+# the result could change
+_absent_paths: Set[str] = set()
+# Whether the result depends on anything that cannot be tracked
+_untrackable = False
+
+
+def add_depfile_arguments(parser: 'argparse._ActionsContainer') -> None:
+    parser.add_argument(
+        "--depfile",
+        dest="depfile",
+        metavar="PATH",
+        default=None,
+        help="Write a Make-style dependency file that lists all files that "
+            "affected the output"
+    )
+
+
+def start_tracking() -> None:
+    global _dependencies, _untrackable # pylint: disable=global-statement
+    _dependencies = []
+    _dependency_set.clear()
+    _absent_paths.clear()
+    _untrackable = False
+
+
+def stop_tracking() -> List[str]:
+    """
+    Stop tracking, and return all files that were read
+    """
+    global _dependencies # pylint: disable=global-statement
+    assert _dependencies is not None
+    paths = _dependencies
+    _dependencies = None
+    _dependency_set.clear()
+    return paths
+
+
+def is_tracking() -> bool:
+    return _dependencies is not None
+
+
+def add_dependencies(paths: Iterable[str]) -> None:
+    """
+    Record files that the running command's result depends on
+    """
+    if _dependencies is None:
+        return
+    for path in paths:
+        if path not in _dependency_set:
+            _dependency_set.add(path)
+            _dependencies.append(path)
+
+
+def add_absent_paths(paths: Iterable[str]) -> None:
+    """
+    Record paths that were searched for, but did not exist
+    """
+    if _dependencies is None:
+        return
+    _absent_paths.update(paths)
+
+
+def mark_untrackable() -> None:
+    """
+    Record that the running command's result depends on something other than
+    files, such as Perl preprocessor snippets that can read the environment
+    """
+    global _untrackable # pylint: disable=global-statement
+    _untrackable = True
+
+
+def get_absent_paths() -> List[str]:
+    """
+    Paths that were searched for, but did not exist, during the most recent
+    tracking
+    """
+    return sorted(_absent_paths)
+
+
+def is_trackable() -> bool:
+    """
+    Whether the result of the most recent tracking only depends on files
+    """
+    return not _untrackable
+
+
+def _escape_make_path(path: str) -> str:
+    # Same escaping as GCC's -MD
+    path = path.replace("$", "$$").replace("#", "\\#")
+    return path.replace(" ", "\\ ")
+
+
+def write_depfile(path: str, targets: List[str], prerequisites: List[str]) -> None:
+    """
+    Write a Make-style dependency file
+    """
+    if not targets:
+        # Commands that do not write any files still need a target for the
+        # rule to be valid. Use the depfile itself.
+        targets = [path]
+
+    lines = [" ".join(_escape_make_path(target) for target in targets) + ":"]
+    lines.extend(" " + _escape_make_path(prerequisite) for prerequisite in prerequisites)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(" \\\n".join(lines) + "\n")
@@ -1,10 +1,11 @@
-from typing import TYPE_CHECKING, List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Union
 
 from .config import schema
 from .config.loader import AppConfig
 
 if TYPE_CHECKING:
     import argparse
+    import mmap
     from systemrdl import RDLCompiler
 
 class Importer:
@@ -28,7 +29,7 @@ class Importer:
         self.cfg: Dict[str, Any] = {}
 
     def _load_cfg(self, cfg: AppConfig) -> None:
-        self.cfg = cfg.get_namespace(self.name, schema.normalize(self.cfg_schema))
+        self.cfg = cfg.get_namespace(self.name, schema.normalize(self.cfg_schema), self)
 
     def is_compatible(self, path: str) -> bool:
         """
@@ -56,6 +57,26 @@ class Importer:
         """
         raise NotImplementedError
 
+    def is_compatible_contents(self, path: str, contents: 'Union[bytes, mmap.mmap]') -> bool:
+        """
+        Same as :meth:`is_compatible`, except that PeakRDL already opened the
+        file. This way, the file is only read once, regardless of how many
+        importers need to check it.
+
+        By default, this calls :meth:`is_compatible`. Override this instead
+        to avoid reading the file again.
+
+        Parameters
+        ----------
+        path: str
+            Path to the input file
+        contents: bytes-like object
+            Read-only, memory-mapped contents of the input file. Supports
+            slicing, as well as searching using ``bytes`` regular expressions.
+            Only valid for the duration of the call.
+        """
+        return self.is_compatible(path)
+
 
     def add_importer_arguments(self, arg_group: 'argparse._ActionsContainer') -> None:
         """
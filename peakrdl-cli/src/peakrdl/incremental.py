@@ -0,0 +1,144 @@
+from typing import TYPE_CHECKING, List, Optional, Tuple, Any
+import os
+
+from systemrdl import __version__ as systemrdl_version
+
+from .__about__ import __version__
+from .plugins.entry_points import get_plugin_entry_points
+from . import cache
+
+if TYPE_CHECKING:
+    import argparse
+    from .config.loader import AppConfig
+
+# (path, mtime_ns, size, hash)
+FileState = Tuple[str, int, int, Optional[str]]
+
+def add_incremental_arguments(parser: 'argparse._ActionsContainer') -> None:
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Skip the command if none of its inputs, outputs or the installed "
+            "plugins changed since it was last run with this option. Commands "
+            "that do not write any files are never skipped"
+    )
+
+
+# Changed whenever the format of stamps changes
+_STAMP_FORMAT = 2
+
+
+def get_stamp_key(argv: List[str], cfg: 'AppConfig') -> str:
+    return cache.make_key(_STAMP_FORMAT, os.getcwd(), argv, cfg.path)
+
+
+def _get_tool_versions(cfg: 'AppConfig') -> List[Any]:
+    versions: List[Any] = [__version__, systemrdl_version]
+    for group in ("peakrdl.importers", "peakrdl.exporters"):
+        versions.append(sorted(
+            (ep.name, dist_name or "", dist_version or "")
+            for ep, dist_name, dist_version in get_plugin_entry_points(group)
+        ))
+
+    # Plugins from the config file have no version. Use their module's file
+    for kind in ("importers", "exporters"):
+        versions.append(sorted(
+            (name, handle.value, handle.get_module_state())
+            for name, handle in cfg.peakrdl_cfg['plugins'][kind].items()
+        ))
+    return versions
+
+
+def _get_file_state(path: str, with_hash: bool) -> Optional[FileState]:
+    try:
+        st = os.stat(path)
+        file_hash = cache.hash_file(path) if with_hash else None
+    except OSError:
+        return None
+    return (path, st.st_mtime_ns, st.st_size, file_hash)
+
+
+def _is_file_unchanged(state: FileState) -> bool:
+    path, mtime_ns, size, file_hash = state
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if st.st_mtime_ns == mtime_ns and st.st_size == size:
+        return True
+    if file_hash is None or st.st_size != size:
+        return False
+
+    # File was touched. Only consider it changed if its contents differ
+    try:
+        return cache.hash_file(path) == file_hash
+    except OSError:
+        return False
+
+
+def _walk_outputs(output_paths: List[str]) -> List[str]:
+    files: List[str] = []
+    for output_path in output_paths:
+        if os.path.isdir(output_path):
+            for dirpath, _, filenames in os.walk(output_path):
+                files.extend(os.path.join(dirpath, filename) for filename in filenames)
+        else:
+            files.append(output_path)
+    return [os.path.abspath(path) for path in files]
+
+
+def is_up_to_date(key: str, cfg: 'AppConfig') -> bool:
+    """
+    Check whether the command identified by key ran previously, and none of
+    its inputs, outputs or the tools themselves changed since.
+    """
+    stamp = cache.load("stamps", key)
+    if stamp is None:
+        return False
+    tool_versions, inputs, absent_paths, outputs = stamp
+    if not outputs:
+        # Skipping the command would lose its console output
+        return False
+
+    # Outputs are checked first since they are cheapest to compare
+    for state in outputs:
+        if not _is_file_unchanged(state):
+            return False
+    for state in inputs:
+        if not _is_file_unchanged(state):
+            return False
+    # A new file could shadow an include
+    for path in absent_paths:
+        if os.path.exists(path):
+            return False
+    return tool_versions == _get_tool_versions(cfg)
+
+
+def store_stamp(key: str, cfg: 'AppConfig', input_paths: List[str], absent_paths: List[str], output_paths: List[str]) -> None:
+    """
+    Record the state of all inputs and outputs of a command that completed
+    successfully, and the paths that it searched for but did not exist.
+
+    Nothing is recorded if the command did not write any files, since its
+    output would be lost if it was skipped.
+    """
+    if not output_paths:
+        return
+
+    inputs = []
+    for path in sorted(set(os.path.abspath(path) for path in input_paths)):
+        state = _get_file_state(path, True)
+        if state is None:
+            # Cannot track a dependency that no longer exists
+            return
+        inputs.append(state)
+
+    outputs = []
+    for path in _walk_outputs(output_paths):
+        state = _get_file_state(path, False)
+        if state is None:
+            return
+        outputs.append(state)
+
+    cache.store("stamps", key, (_get_tool_versions(cfg), inputs, absent_paths, outputs))
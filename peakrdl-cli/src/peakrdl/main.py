@@ -1,19 +1,29 @@
 import argparse
 import sys
+import os
 import inspect
+import cProfile
 from typing import List, Dict, Optional, NoReturn
 
 from systemrdl import RDLCompileError
 
 from .__about__ import __version__
 from .config.loader import load_cfg, AppConfig
-from .plugins.exporter import get_exporter_plugins
+from .plugins.exporter import get_exporter_plugins, get_exporter_descriptions, LazyExporterSubcommandPlugin
 from .plugins.importer import get_importer_plugins
 from .cmd.dump import Dump
 from .cmd.list_globals import ListGlobals
 from .cmd.preprocess import Preprocess
+from .cmd.lookup import Lookup
+from .cmd.multi import Multi
+from .cmd.serve import Serve
+from .cmd.batch import Batch
 from .subcommand import Subcommand
 from . import argfile
+from . import client
+from . import incremental
+from . import dependencies
+from . import timing
 
 
 DESCRIPTION = """
@@ -44,63 +54,180 @@ class ReportPluginsImpl(argparse.Action):
         print("importers:")
         for importer in importers:
             print(f"\t{importer.plugin_info}")
+        # Load each plugin so that its config is validated
+        for exporter in exporters:
+            exporter._load_cfg(self.CFG)
+            if isinstance(exporter, LazyExporterSubcommandPlugin):
+                exporter.load()
+
         print("exporters:")
         for exporter in exporters:
             print(f"\t{exporter.plugin_info}")
         sys.exit(0)
 
 
-def get_peakrdl_cfg_arg(argv: List[str]) -> Optional[str]:
-    # lazy-parse argv to see if user provided a config file explicitly
-    path = None
+def get_option_arg(argv: List[str], option: str) -> Optional[str]:
+    # lazy-parse argv to see if user provided an option's value
+    value = None
     argv_iter = iter(argv)
     for arg in argv_iter:
-        if arg == "--peakrdl-cfg":
+        if arg == option:
             try:
-                path = next(argv_iter)
+                value = next(argv_iter)
             except StopIteration:
-                print("error: argument --peakrdl-cfg: expected FILE", file=sys.stderr)
+                print(f"error: argument {option}: expected FILE", file=sys.stderr)
                 sys.exit(1)
             break
-    return path
+        if arg.startswith(option + "="):
+            value = arg[len(option) + 1:]
+            break
+    return value
+
+
+def get_peakrdl_cfg_arg(argv: List[str]) -> Optional[str]:
+    # lazy-parse argv to see if user provided a config file explicitly
+    return get_option_arg(argv, "--peakrdl-cfg")
+
+
+def get_subcommand_arg(argv: List[str]) -> Optional[str]:
+    # lazy-parse argv to see which subcommand the user selected, if any
+    argv_iter = iter(argv)
+    for arg in argv_iter:
+        if arg in ("-h", "--help"):
+            # Top-level help was requested
+            return None
+        if arg in ("-f", "--peakrdl-cfg", "--timing-trace", "--profile"):
+            # Skip the option's value. The --option=value form is a single arg
+            next(argv_iter, None)
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
+
+def add_subcommand_placeholders(subgroup: 'argparse._SubParsersAction', subcommands: List[Subcommand]) -> None:
+    """
+    Add a subparser without any arguments for each subcommand
+    """
+    lazy_exporters = [sc for sc in subcommands if isinstance(sc, LazyExporterSubcommandPlugin)]
+    descriptions = get_exporter_descriptions(lazy_exporters)
+    for subcommand in subcommands:
+        if isinstance(subcommand, LazyExporterSubcommandPlugin):
+            short_desc = descriptions[subcommand.name]
+        else:
+            short_desc = subcommand.short_desc
+        subgroup.add_parser(subcommand.name, help=short_desc)
 
 
 def main() -> None:
+    # Let a running 'peakrdl serve' process execute the command if possible
+    server_path = os.environ.get("PEAKRDL_SERVER")
+    if server_path:
+        exit_code = client.forward(server_path, sys.argv[1:])
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    # Timing is enabled before it is known whether it was requested, so that
+    # argfile expansion is included
+    timing.start()
+
     # manually expand any -f argfiles first
-    argv = argfile.expand_argfile(sys.argv[1:])
+    argfiles: List[str] = []
+    with timing.phase("argfile expansion"):
+        argv = argfile.expand_argfile(sys.argv[1:], files_read=argfiles)
+
+    trace_path = get_option_arg(argv, "--timing-trace")
+    if "--timing" not in argv and trace_path is None:
+        timing.stop()
+
+    profile_path = get_option_arg(argv, "--profile")
+    profiler = None
+    if profile_path is not None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        run(argv, argfiles)
+    finally:
+        if profiler is not None and profile_path is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        if timing.is_enabled():
+            records = timing.stop()
+            if "--timing" in argv:
+                sys.stderr.write(timing.format_report(records))
+            if trace_path is not None:
+                timing.write_chrome_trace(trace_path, records)
 
+
+def run(argv: List[str], argfiles: List[str]) -> None:
+    """
+    Run the command given by the already expanded command line arguments
+    """
     peakrdl_cfg_path = get_peakrdl_cfg_arg(argv)
     try:
-        cfg = load_cfg(peakrdl_cfg_path)
+        with timing.phase("config discovery"):
+            cfg = load_cfg(peakrdl_cfg_path)
     except ValueError as e:
         print(e.args[0], file=sys.stderr)
         sys.exit(1)
 
-    # Collect all importers and initialize them with the config
-    importers = get_importer_plugins(cfg)
-    for importer in importers:
-        importer._load_cfg(cfg)
+    # Skip incremental builds entirely if nothing changed since the last run
+    stamp_key = None
+    if "--incremental" in argv:
+        stamp_key = incremental.get_stamp_key(argv, cfg)
+        if incremental.is_up_to_date(stamp_key, cfg):
+            sys.exit(0)
 
     # Collect all subcommands
+    # Exporter plugins are not imported until they are actually used
+    # sc_dict is populated below, and is used by 'multi' and 'serve' to look up exporters
+    sc_dict: Dict[str, Subcommand] = {}
     subcommands: List[Subcommand] = [
         Dump(),
         ListGlobals(),
         Preprocess(),
+        Lookup(),
+        Multi(sc_dict),
+        Serve(sc_dict, main),
+        Batch(sc_dict, main),
     ]
-    subcommands += get_exporter_plugins(cfg)
-    for subcommand in subcommands:
-        subcommand._load_cfg(cfg)
+    with timing.phase("exporter plugin discovery"):
+        subcommands += get_exporter_plugins(cfg)
+        for subcommand in subcommands:
+            subcommand._load_cfg(cfg)
 
     # Check for duplicate subcommands
-    sc_dict: Dict[str, Subcommand] = {}
     for sc in subcommands:
         if sc.name in sc_dict:
             other_sc = sc_dict[sc.name]
+            if isinstance(sc, LazyExporterSubcommandPlugin):
+                sc = sc.load()
+            if isinstance(other_sc, LazyExporterSubcommandPlugin):
+                other_sc = other_sc.load()
             sc_loc = f"{inspect.getfile(sc.__class__)}:{sc.__class__.__name__}"
             other_sc_loc = f"{inspect.getfile(other_sc.__class__)}:{other_sc.__class__.__name__}"
             raise RuntimeError(f"More than one exporter plugin was registered with the same name '{sc.name}': \n\t{other_sc_loc}\n\t{sc_loc}")
         sc_dict[sc.name] = sc
 
+    # Only the selected subcommand needs its arguments defined.
+    # If none was selected, argparse can only report help or an error, which
+    # only needs the names and descriptions of all subcommands.
+    selected_sc_name = get_subcommand_arg(argv)
+    if selected_sc_name in sc_dict:
+        active_subcommands = [sc_dict[selected_sc_name]]
+    else:
+        active_subcommands = []
+
+    # Collect all importers and initialize them with the config
+    # Subcommands that do not read any input files do not need them
+    if any(sc._uses_importers for sc in active_subcommands):
+        with timing.phase("importer plugin discovery"):
+            importers = get_importer_plugins(cfg)
+            for importer in importers:
+                importer._load_cfg(cfg)
+    else:
+        importers = []
+
     # Initialize top-level arg parser
     class ReportPlugins(ReportPluginsImpl):
         CFG = cfg
@@ -128,21 +255,48 @@ def main() -> None:
         dest="peakrdl_cfg",
         help="Specify a PeakRDL configuration TOML file"
     )
+    timing.add_timing_arguments(parser)
 
     # Initialize subcommand arg parsers
-    subgroup = parser.add_subparsers(
-        title="subcommands",
-        metavar="<subcommand>",
-        required=True
-    )
-    for subcommand in subcommands:
-        subcommand._init_subparser(subgroup, importers)
+    with timing.phase("argument parsing"):
+        subgroup = parser.add_subparsers(
+            title="subcommands",
+            metavar="<subcommand>",
+            required=True
+        )
+        if active_subcommands:
+            for subcommand in active_subcommands:
+                subcommand._init_subparser(subgroup, importers)
+        elif "--version" not in argv and "--plugins" not in argv:
+            # argparse exits before checking for a subcommand if these are given
+            add_subcommand_placeholders(subgroup, list(sc_dict.values()))
 
-    # Process command-line args
-    options = parser.parse_args(argv)
+        # Process command-line args
+        options = parser.parse_args(argv)
+
+    # Keep track of all files that are read if they need to be reported later
+    track_dependencies = stamp_key is not None or bool(getattr(options, "depfile", None))
+    if track_dependencies:
+        dependencies.start_tracking()
+        dependencies.add_dependencies(argfiles)
+        if cfg.path:
+            dependencies.add_dependencies([cfg.path])
 
     # Run subcommand!
     try:
-        options.subcommand.main(importers, options)
+        with timing.phase(options.subcommand.name):
+            options.subcommand.main(importers, options)
     except RDLCompileError:
         sys.exit(1)
+
+    if track_dependencies:
+        input_paths = dependencies.stop_tracking()
+        output_paths = options.subcommand._get_output_paths(options)
+        if getattr(options, "depfile", None):
+            dependencies.write_depfile(options.depfile, output_paths, input_paths)
+        # Results that depend on anything other than files, such as Perl
+        # preprocessor snippets, can never be considered up to date
+        if stamp_key is not None and getattr(options, "incremental", False) and dependencies.is_trackable():
+            incremental.store_stamp(
+                stamp_key, cfg, input_paths, dependencies.get_absent_paths(), output_paths
+            )
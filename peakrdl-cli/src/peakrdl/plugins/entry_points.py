@@ -1,6 +1,9 @@
 import sys
+import os
 from typing import List, Tuple, TYPE_CHECKING, Optional
 
+from .. import cache
+
 if TYPE_CHECKING:
     from importlib.metadata import EntryPoint, Distribution
 
@@ -16,6 +19,9 @@ if sys.version_info >= (3,10,0):
     def _get_name_from_dist(dist: 'Distribution') -> str:
         return dist.name
 
+    def _make_entry_point(name: str, value: str, group: str) -> 'EntryPoint':
+        return metadata.EntryPoint(name, value, group)
+
 elif sys.version_info >= (3,8,0): # pragma: no cover
     from importlib import metadata
 
@@ -39,6 +45,9 @@ elif sys.version_info >= (3,8,0): # pragma: no cover
     def _get_name_from_dist(dist: 'Distribution') -> str:
         return dist.metadata["Name"]
 
+    def _make_entry_point(name: str, value: str, group: str) -> 'EntryPoint':
+        return metadata.EntryPoint(name, value, group)
+
 else: # pragma: no cover
     import pkg_resources
 
@@ -57,3 +66,98 @@ def get_entry_points(group_name: str) -> List[Tuple['EntryPoint', Optional['Dist
 
 def get_name_from_dist(dist: 'Distribution') -> str:
     return _get_name_from_dist(dist)
+
+def get_entry_point_value(ep: 'EntryPoint') -> str:
+    """
+    Get the object reference of an entry point, in 'module:attr' form
+    """
+    if hasattr(ep, "value"):
+        return ep.value
+    # pkg_resources.EntryPoint does not provide the original string
+    value = ep.module_name # type: ignore
+    if ep.attrs: # type: ignore
+        value += ":" + ".".join(ep.attrs) # type: ignore
+    return value
+
+
+def _get_search_paths() -> List[str]:
+    """
+    Search paths that distributions are discovered in.
+
+    The current working directory is excluded. Under 'python -m' it is on
+    sys.path, but it is not expected to contain installed distributions, and
+    any write to it would otherwise invalidate the cache.
+    """
+    cwd = os.getcwd()
+    return [
+        path for path in sys.path
+        if path and os.path.abspath(path) != cwd
+    ]
+
+
+def _get_dist_fingerprint() -> List[Tuple[str, int]]:
+    """
+    Cheap fingerprint of the installed distributions.
+
+    Installing, upgrading or removing a distribution adds or removes its
+    metadata directory, which updates the modification time of the enclosing
+    search path. Reinstalling a distribution in-place, such as with
+    'setup.py develop', only rewrites its entry_points.txt, so those are
+    included as well.
+    """
+    fingerprint = []
+    for path in _get_search_paths():
+        try:
+            fingerprint.append((path, os.stat(path).st_mtime_ns))
+            with os.scandir(path) as it:
+                entries = sorted(
+                    entry.path for entry in it
+                    if entry.name.endswith((".dist-info", ".egg-info"))
+                )
+        except OSError:
+            continue
+        for entry_path in entries:
+            ep_path = os.path.join(entry_path, "entry_points.txt")
+            try:
+                fingerprint.append((ep_path, os.stat(ep_path).st_mtime_ns))
+            except OSError:
+                continue
+    return fingerprint
+
+
+def get_plugin_entry_points(group_name: str) -> List[Tuple['EntryPoint', Optional[str], Optional[str]]]:
+    """
+    Get entry points of the given group along with the name and version of the
+    distribution that provides each one.
+
+    Results are cached on disk until the set of installed distributions changes.
+    """
+    if sys.version_info < (3,8,0): # pragma: no cover
+        # Caching is not supported by pkg_resources entry points
+        key = None
+    else:
+        key = cache.make_key(group_name, sys.executable, _get_search_paths())
+        fingerprint = _get_dist_fingerprint()
+        cached = cache.load("entry_points", key)
+        if cached is not None and cached[0] == fingerprint:
+            return [
+                (_make_entry_point(name, value, group_name), dist_name, dist_version)
+                for name, value, dist_name, dist_version in cached[1]
+            ]
+
+    eps = []
+    for ep, dist in get_entry_points(group_name):
+        if dist:
+            dist_name = get_name_from_dist(dist)
+            dist_version = dist.version
+        else:
+            dist_name = None
+            dist_version = None
+        eps.append((ep, dist_name, dist_version))
+
+    if key is not None:
+        cache.store("entry_points", key, (fingerprint, [
+            (ep.name, ep.value, dist_name, dist_version)
+            for ep, dist_name, dist_version in eps
+        ]))
+    return eps
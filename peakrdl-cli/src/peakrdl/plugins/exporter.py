@@ -1,11 +1,18 @@
-from typing import List, TYPE_CHECKING, Optional
+from typing import List, TYPE_CHECKING, Optional, Union, Dict, Sequence
 import inspect
 
-from .entry_points import get_entry_points, get_name_from_dist
-from ..subcommand import ExporterSubcommand
+from .entry_points import get_plugin_entry_points, get_entry_point_value
+from ..subcommand import Subcommand, ExporterSubcommand
+from .. import timing
+from .. import cache
+from ..config.schema import PythonObjectHandle
+from ..config.loader import load_object
 
 if TYPE_CHECKING:
+    import argparse
+    from importlib.metadata import EntryPoint
     from ..config.loader import AppConfig
+    from .importer import ImporterPlugin
 
 class ExporterSubcommandPlugin(ExporterSubcommand):
     """
@@ -24,7 +31,69 @@ class ExporterSubcommandPlugin(ExporterSubcommand):
             return f"{self.name} --> {inspect.getabsfile(type(self))}:{type(self).__name__}"
 
 
-def get_exporter_plugins(cfg: 'AppConfig') -> List[ExporterSubcommandPlugin]:
+class LazyExporterSubcommandPlugin(Subcommand):
+    """
+    Placeholder for an exporter plugin that was advertised via an entry point.
+
+    The plugin's module is not imported until the subcommand is actually used.
+    """
+    def __init__(self, name: str, ep: 'Union[EntryPoint, PythonObjectHandle]', dist_name: Optional[str]=None, dist_version: Optional[str]=None) -> None:
+        super().__init__()
+        self.name = name
+
+        # Entry point, or handle of an exporter specified in the config file.
+        # Both are loaded the same way
+        self.ep = ep
+        if isinstance(ep, PythonObjectHandle):
+            self.spec = ep.value
+        else:
+            self.spec = get_entry_point_value(ep)
+        self.dist_name = dist_name
+        self.dist_version = dist_version
+        self._app_cfg: Optional['AppConfig'] = None
+        self._plugin: Optional[ExporterSubcommandPlugin] = None
+
+    def load(self) -> ExporterSubcommandPlugin:
+        """
+        Import the exporter plugin's class and instantiate it.
+        """
+        if self._plugin is None:
+            with timing.phase(f"import {self.name} plugin"):
+                if isinstance(self.ep, PythonObjectHandle):
+                    cls = load_object(self.ep)
+                else:
+                    cls = self.ep.load()
+            if issubclass(cls, ExporterSubcommandPlugin):
+                # Override name - always use entry point's name
+                cls.name = self.name
+                self._plugin = cls(dist_name=self.dist_name, dist_version=self.dist_version)
+            else:
+                raise RuntimeError(f"Exporter class {cls} is expected to be extended from peakrdl.plugins.exporter.ExporterSubcommandPlugin")
+            if self._app_cfg is not None:
+                self._plugin._load_cfg(self._app_cfg)
+        return self._plugin
+
+    @property
+    def plugin_info(self) -> str:
+        if self.dist_name and self.dist_version:
+            return f"{self.name} --> {self.dist_name} {self.dist_version}"
+        else:
+            return self.load().plugin_info
+
+    def _load_cfg(self, cfg: 'AppConfig') -> None:
+        # Defer validating the plugin's config namespace until it is loaded
+        self._app_cfg = cfg
+        if self._plugin is not None:
+            self._plugin._load_cfg(cfg)
+
+    def _init_subparser(self, subgroup: 'argparse._SubParsersAction', importers: 'List[ImporterPlugin]') -> None:
+        self.load()._init_subparser(subgroup, importers)
+
+    def main(self, importers: 'List[ImporterPlugin]', options: 'argparse.Namespace') -> None:
+        self.load().main(importers, options)
+
+
+def get_exporter_plugins(cfg: 'AppConfig') -> List[Union[ExporterSubcommandPlugin, LazyExporterSubcommandPlugin]]:
     """
     Load any plugins that advertise themselves in their setup.py via the following:
 
@@ -36,35 +105,45 @@ def get_exporter_plugins(cfg: 'AppConfig') -> List[ExporterSubcommandPlugin]:
             ]
         },
     )
+
+    Plugins discovered via entry points or the config file are returned as
+    lazy placeholders. Their modules are only imported once they are actually
+    needed.
     """
-    exporters = []
+    exporters: List[Union[ExporterSubcommandPlugin, LazyExporterSubcommandPlugin]] = []
 
     # Get exporter plugins from entry-points
-    for ep, dist in get_entry_points("peakrdl.exporters"):
-        cls = ep.load()
-        if dist:
-            dist_name = get_name_from_dist(dist)
-            dist_version = dist.version
-        else:
-            dist_name = None
-            dist_version = None
-
-        if issubclass(cls, ExporterSubcommandPlugin):
-            # Override name - always use entry point's name
-            cls.name = ep.name
-            exporter = cls(dist_name=dist_name, dist_version=dist_version)
-        else:
-            raise RuntimeError(f"Exporter class {cls} is expected to be extended from peakrdl.plugins.exporter.ExporterSubcommandPlugin")
-        exporters.append(exporter)
+    for ep, dist_name, dist_version in get_plugin_entry_points("peakrdl.exporters"):
+        exporters.append(LazyExporterSubcommandPlugin(ep.name, ep, dist_name, dist_version))
 
     # Get any additional exporter plugins from config
-    for name, cls in cfg.peakrdl_cfg['plugins']['exporters'].items():
-        if issubclass(cls, ExporterSubcommandPlugin):
-            # Override name - always use entry point's name
-            cls.name = name
-            exporter = cls()
-        else:
-            raise RuntimeError(f"Exporter class {cls} is expected to be extended from peakrdl.plugins.exporter.ExporterSubcommandPlugin")
-        exporters.append(exporter)
+    for name, handle in cfg.peakrdl_cfg['plugins']['exporters'].items():
+        exporters.append(LazyExporterSubcommandPlugin(name, handle))
 
     return exporters
+
+
+def get_exporter_descriptions(exporters: Sequence[LazyExporterSubcommandPlugin]) -> Dict[str, str]:
+    """
+    Get the short description of each lazily loaded exporter plugin.
+
+    Descriptions of installed plugins are cached, so that listing the
+    available subcommands does not need to import them. The cache is
+    invalidated if any of them are added, removed or change version.
+    Plugins without a version could change without invalidating the cache, so
+    they are always imported.
+    """
+    versioned = [exporter for exporter in exporters if exporter.dist_version]
+    key = cache.make_key([
+        (exporter.name, exporter.spec, exporter.dist_name, exporter.dist_version)
+        for exporter in versioned
+    ])
+    descriptions = cache.load("exporter_descriptions", key)
+    if descriptions is None:
+        descriptions = {exporter.name: exporter.load().short_desc for exporter in versioned}
+        cache.store("exporter_descriptions", key, descriptions)
+
+    for exporter in exporters:
+        if not exporter.dist_version:
+            descriptions[exporter.name] = exporter.load().short_desc
+    return descriptions
@@ -1,8 +1,9 @@
 from typing import List, TYPE_CHECKING, Optional
 import inspect
 
-from .entry_points import get_entry_points, get_name_from_dist
+from .entry_points import get_plugin_entry_points
 from ..importer import Importer
+from ..config.loader import load_object
 
 if TYPE_CHECKING:
     from ..config.loader import AppConfig
@@ -40,15 +41,8 @@ def get_importer_plugins(cfg: 'AppConfig') -> List[ImporterPlugin]:
     importers = []
 
     # Get importer plugins from entry-points
-    for ep, dist in get_entry_points("peakrdl.importers"):
+    for ep, dist_name, dist_version in get_plugin_entry_points("peakrdl.importers"):
         cls = ep.load()
-        if dist:
-            dist_name = get_name_from_dist(dist)
-            dist_version = dist.version
-        else:
-            dist_name = None
-            dist_version = None
-
         if issubclass(cls, ImporterPlugin):
             # Override name - always use entry point's name
             cls.name = ep.name
@@ -58,7 +52,8 @@ def get_importer_plugins(cfg: 'AppConfig') -> List[ImporterPlugin]:
         importers.append(importer)
 
     # Get any additional importer plugins from config
-    for name, cls in cfg.peakrdl_cfg['plugins']['importers'].items():
+    for name, handle in cfg.peakrdl_cfg['plugins']['importers'].items():
+        cls = load_object(handle)
         if issubclass(cls, ImporterPlugin):
             # Override name - always use entry point's name
             cls.name = name
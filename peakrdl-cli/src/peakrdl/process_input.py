@@ -1,14 +1,31 @@
-from typing import TYPE_CHECKING, List, Dict, Any, Sequence
+from typing import TYPE_CHECKING, List, Dict, Any, Sequence, Type, Optional, Tuple, Callable, TypeVar, Union
 import re
 import os
+import io
+import mmap
+import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
 
-from systemrdl.messages import FileSourceRef
+from systemrdl import RDLCompiler, __version__ as systemrdl_version
+from systemrdl.messages import FileSourceRef, MessagePrinter
+from systemrdl.properties.user_defined import ExternalUserProperty
+
+from .__about__ import __version__
+from . import cache
+from . import dependencies
+from . import timing
 
 if TYPE_CHECKING:
     import argparse
-    from systemrdl import RDLCompiler
+    from systemrdl.messages import Severity
+    from systemrdl.node import RootNode
+    from systemrdl.source_ref import SourceRefBase
+    from systemrdl.udp import UDPDefinition
     from .importer import Importer
 
+T = TypeVar("T")
+
 
 def add_rdl_compile_arguments(parser: 'argparse._ActionsContainer') -> None:
     parser.add_argument(
@@ -32,6 +49,15 @@ def add_rdl_compile_arguments(parser: 'argparse._ActionsContainer') -> None:
         default=[],
         help="Pre-define a Verilog-style preprocessor macro"
     )
+    parser.add_argument(
+        "--compile-jobs",
+        dest="compile_jobs",
+        metavar="N",
+        type=int,
+        default=1,
+        help="Compile or import up to N input files in parallel. Requires a "
+            "platform that supports fork()"
+    )
 
 
 def add_importer_arguments(parser: 'argparse._ActionsContainer', importers: 'Sequence[Importer]') -> None:
@@ -97,10 +123,601 @@ def parse_defines(rdlc: 'RDLCompiler', define_options: List[str]) -> Dict[str, s
     return defines
 
 
-def process_input(rdlc: 'RDLCompiler', importers: 'Sequence[Importer]', input_files: List[str], options: 'argparse.Namespace') -> None:
+def process_input(rdlc: 'RDLCompiler', importers: 'Sequence[Importer]', input_files: List[str], options: 'argparse.Namespace') -> List[str]:
+    """
+    Compile or import all input files into the compiler's root namespace.
+
+    Returns the paths of all files that were read, including any files that
+    were included by the preprocessor.
+    """
     defines = parse_defines(rdlc, options.defines)
-    for file in input_files:
-        load_file(rdlc, importers, file, defines, options.incdirs, options)
+
+    # sphinx-peakrdl calls this with its own options
+    jobs = getattr(options, "compile_jobs", 1)
+    parallel_files = [path for path in input_files if os.path.isfile(path)]
+    jobs = min(jobs, len(parallel_files))
+    if jobs > 1 and "fork" in multiprocessing.get_all_start_methods():
+        files_read = _process_input_parallel(
+            rdlc, importers, input_files, parallel_files, defines, options, jobs
+        )
+    else:
+        files_read = []
+        for file in input_files:
+            with timing.phase(f"load {file}"):
+                files_read.extend(load_file(rdlc, importers, file, defines, options.incdirs, options))
+    dependencies.add_dependencies(files_read)
+    return files_read
+
+
+# Context of the process_input() call that is being parallelized.
+# Workers are forked, so they inherit it rather than receiving a pickled copy.
+_pending_input: 'Optional[Tuple[Sequence[Importer], Dict[str, str], argparse.Namespace, List[Tuple[Type[UDPDefinition], bool]]]]' = None
+
+
+def _process_input_parallel(
+        rdlc: 'RDLCompiler',
+        importers: 'Sequence[Importer]',
+        input_files: List[str],
+        parallel_files: List[str],
+        defines: Dict[str, str],
+        options: 'argparse.Namespace',
+        jobs: int,
+    ) -> List[str]:
+    """
+    Compile or import each file in a separate worker process, then link the
+    results into the compiler's root namespace in the original file order.
+
+    A file only compiles on its own if it does not refer to anything declared
+    by an earlier file. Files that fail to do so, or that cannot be linked
+    as-is, are loaded again by this process once all earlier files were
+    linked. This way, the result and any reported messages are identical to
+    loading all files serially.
+    """
+    global _pending_input # pylint: disable=global-statement
+
+    # Workers need the same UDPs that were registered in the compiler
+    udp_definitions = [
+        (type(udp.definition), udp.is_soft)
+        for udp in rdlc.env.property_rules.user_properties.values()
+        if isinstance(udp, ExternalUserProperty)
+    ]
+    _pending_input = (importers, defines, options, udp_definitions)
+
+    files_read = []
+    try:
+        with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("fork")) as executor:
+            futures: 'Dict[str, Future[Optional[bytes]]]' = {
+                path: executor.submit(_load_file_worker, path)
+                for path in parallel_files
+            }
+
+            for path in input_files:
+                if path in futures:
+                    with timing.phase(f"link {path}"):
+                        try:
+                            result = futures[path].result()
+                        except Exception: # pylint: disable=broad-exception-caught
+                            # Result could not be transferred
+                            result = None
+                        if result is not None:
+                            worker_files_read = _link_loaded_file(rdlc, result)
+                        else:
+                            worker_files_read = None
+                    if worker_files_read is not None:
+                        files_read.extend(worker_files_read)
+                        continue
+                with timing.phase(f"load {path}"):
+                    files_read.extend(load_file(rdlc, importers, path, defines, options.incdirs, options))
+    finally:
+        _pending_input = None
+    return files_read
+
+
+class _CompileAbandoned(Exception):
+    pass
+
+
+class _AbandoningMessagePrinter(MessagePrinter):
+    """
+    Message printer that aborts compilation as soon as anything is reported.
+    Messages are left to the compiler that retries the file.
+    """
+    def print_message(self, severity: 'Severity', text: str, src_ref: 'Optional[SourceRefBase]') -> None:
+        raise _CompileAbandoned
+
+
+class _WorkerResultPickler(pickle.Pickler):
+    """
+    Pickles a compiled file's namespace without the worker's compiler state.
+    These references are replaced with the linking compiler's equivalents
+    when unpickled.
+    """
+    def __init__(self, f: io.BytesIO, rdlc: 'RDLCompiler') -> None:
+        super().__init__(f, pickle.HIGHEST_PROTOCOL)
+        self.shared_ids = {
+            id(rdlc.env): "env",
+            id(rdlc.msg): "msg",
+            id(rdlc.env.property_rules): "property_rules",
+            id(rdlc.root): "root",
+        }
+        for name, udp in rdlc.env.property_rules.user_properties.items():
+            self.shared_ids[id(udp)] = f"udp:{name}"
+
+    def persistent_id(self, obj: Any) -> Optional[str]:
+        return self.shared_ids.get(id(obj))
+
+
+class _WorkerResultUnpickler(pickle.Unpickler):
+    def __init__(self, f: io.BytesIO, rdlc: 'RDLCompiler') -> None:
+        super().__init__(f)
+        self.shared_objs: Dict[str, Any] = {
+            "env": rdlc.env,
+            "msg": rdlc.msg,
+            "property_rules": rdlc.env.property_rules,
+            "root": rdlc.root,
+        }
+        for name, udp in rdlc.env.property_rules.user_properties.items():
+            self.shared_objs[f"udp:{name}"] = udp
+
+    def persistent_load(self, pid: Any) -> Any:
+        return self.shared_objs[pid]
+
+
+def _load_file_worker(path: str) -> Optional[bytes]:
+    """
+    Compile or import a single file with a fresh compiler.
+
+    Returns the pickled contents of its root namespace and all files that
+    were read, or None if the file could not be loaded without reporting any
+    messages.
+    """
+    assert _pending_input is not None
+    importers, defines, options, udp_definitions = _pending_input
+
+    rdlc = RDLCompiler(message_printer=_AbandoningMessagePrinter())
+    for udp, soft in udp_definitions:
+        rdlc.register_udp(udp, soft)
+
+    try:
+        files_read = load_file(rdlc, importers, path, defines, options.incdirs, options)
+    except Exception: # pylint: disable=broad-exception-caught
+        return None
+
+    if rdlc.list_udps():
+        # UDPs declared in SystemRDL modify the compiler's property rules,
+        # which cannot be linked into another compiler
+        return None
+
+    f = io.BytesIO()
+    with cache._gc_paused(): # pylint: disable=protected-access
+        _WorkerResultPickler(f, rdlc).dump((
+            rdlc.namespace.type_ns_stack[0],
+            rdlc.namespace.element_ns_stack[0],
+            rdlc.root.comp_defs,
+            rdlc.root.children,
+            files_read,
+        ))
+    return f.getvalue()
+
+
+def _link_loaded_file(rdlc: 'RDLCompiler', result: bytes) -> Optional[List[str]]:
+    """
+    Add a file that was loaded by a worker to the compiler's root namespace.
+
+    Returns the paths of all files that were read, or None if any of its
+    declarations conflict with existing ones.
+    """
+    with cache._gc_paused(): # pylint: disable=protected-access
+        type_ns, element_ns, comp_defs, children, files_read = _WorkerResultUnpickler(
+            io.BytesIO(result), rdlc
+        ).load()
+
+    root_type_ns = rdlc.namespace.type_ns_stack[0]
+    root_element_ns = rdlc.namespace.element_ns_stack[0]
+    if (
+        any(name in root_type_ns for name in type_ns)
+        or any(name in root_element_ns for name in element_ns)
+        or any(name in rdlc.root.comp_defs for name in comp_defs)
+    ):
+        # Let the compiler report the conflict
+        return None
+
+    root_type_ns.update(type_ns)
+    root_element_ns.update(element_ns)
+    rdlc.root.comp_defs.update(comp_defs)
+    rdlc.root.children.extend(children)
+    return files_read
+
+
+class _MessageMonitor(MessagePrinter):
+    """
+    Message printer that keeps track of whether any messages were reported
+    """
+    def __init__(self) -> None:
+        self.reported_messages = False
+
+    def print_message(self, severity: 'Severity', text: str, src_ref: 'Optional[SourceRefBase]') -> None:
+        self.reported_messages = True
+        super().print_message(severity, text, src_ref)
+
+
+def _get_compile_cache_key(input_files: List[str], options: 'argparse.Namespace', udp_definitions: 'Sequence[Type[UDPDefinition]]') -> Optional[str]:
+    input_file_hashes = []
+    for path in input_files:
+        if os.path.splitext(path)[1].strip(".") != "rdl":
+            # Foreign inputs depend on importer options that cannot be
+            # reliably tracked. Do not cache
+            return None
+        if not os.path.isfile(path):
+            return None
+        input_file_hashes.append((path, os.path.abspath(path), cache.hash_file(path)))
+
+    incdirs = [os.path.abspath(incdir) for incdir in options.incdirs or []]
+
+    udp_info = []
+    for udp in udp_definitions:
+        udp_info.append((
+            udp.__module__, udp.__qualname__, udp.name,
+            sorted(str(c) for c in udp.valid_components),
+            str(udp.valid_type), str(udp.default_assignment),
+            udp.constr_componentwidth,
+        ))
+
+    return cache.make_key(
+        __version__, systemrdl_version,
+        input_file_hashes, options.defines, incdirs, udp_info,
+    )
+
+
+# Tokens that the Perl preprocessor scans for. Same as the ones used by
+# systemrdl.preprocessor, so that commented-out directives are ignored
+_INCLUDE_SCAN_REGEX = re.compile(
+    r'/\*.*?\*/|//.*?$|(?P<perl><%)|`include\s*(?:"(?P<path1>[^"]*)"|<(?P<path2>[^>]*)>)',
+    re.DOTALL | re.MULTILINE
+)
+
+
+def _get_file_records(files_read: List[str], exclude: List[str], incdirs: Optional[List[str]]) -> Optional[List[Tuple[str, Optional[str]]]]:
+    """
+    Describe the files that a cached result depends on, for _load_cached_model().
+
+    Returns the hash of each file that was read, and a None hash for each path
+    that was searched for an include but did not exist. If such a file is
+    created later, it would shadow the file that the include resolved to.
+
+    Returns None if the result shall not be cached because a file uses the
+    Perl preprocessor. Perl snippets can read arbitrary files or the
+    environment, which cannot be tracked.
+    """
+    records: List[Tuple[str, Optional[str]]] = []
+    exclude_paths = set(exclude)
+    absent_paths = set()
+    for path in files_read:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+
+        for m in _INCLUDE_SCAN_REGEX.finditer(text):
+            if m.group("perl"):
+                return None
+            incl_path_raw = m.group("path1") or m.group("path2")
+            if not incl_path_raw or os.path.isabs(incl_path_raw):
+                continue
+            # Same search order as the preprocessor. Record every candidate
+            # up to the one that the include resolved to
+            candidates = [os.path.join(incdir, incl_path_raw) for incdir in incdirs or []]
+            candidates.append(os.path.join(os.path.dirname(path), incl_path_raw))
+            for candidate in candidates:
+                if os.path.isfile(candidate):
+                    break
+                absent_paths.add(os.path.abspath(candidate))
+
+        if path not in exclude_paths:
+            records.append((path, cache.hash_file(path)))
+
+    records.extend((path, None) for path in sorted(absent_paths))
+    return records
+
+
+def _load_cached_model(category: str, key: Optional[str]) -> Optional[Tuple[List[Tuple[str, Optional[str]]], Any]]:
+    """
+    Returns the records of the files that the model depends on, and the
+    model itself
+    """
+    if key is None:
+        return None
+    cached = cache.load(category, key)
+    if cached is None:
+        return None
+
+    # Entry is only valid if none of the included files changed, and no
+    # include would now resolve to a different file
+    included_files, _ = cached
+    for path, file_hash in included_files:
+        if file_hash is None:
+            if os.path.isfile(path):
+                return None
+            continue
+        try:
+            if cache.hash_file(path) != file_hash:
+                return None
+        except OSError:
+            return None
+    return cached
+
+
+def _add_dependencies(input_files: List[str], file_records: Optional[List[Tuple[str, Optional[str]]]]) -> None:
+    """
+    Report the files described by _get_file_records() to the dependency tracker
+    """
+    dependencies.add_dependencies(input_files)
+    if file_records is None:
+        dependencies.mark_untrackable()
+        return
+    dependencies.add_dependencies(path for path, file_hash in file_records if file_hash is not None)
+    dependencies.add_absent_paths(path for path, file_hash in file_records if file_hash is None)
+
+
+def _reported_messages(rdlc: 'RDLCompiler') -> bool:
+    printer = rdlc.msg.printer
+    return not isinstance(printer, _MessageMonitor) or printer.reported_messages
+
+
+def _compile_input(
+        importers: 'Sequence[Importer]',
+        input_files: List[str],
+        options: 'argparse.Namespace',
+        udp_definitions: 'Sequence[Type[UDPDefinition]]',
+        key: Optional[str],
+    ) -> 'Tuple[RDLCompiler, Optional[List[Tuple[str, Optional[str]]]]]':
+    """
+    Returns the compiler, and the records of all files it depends on.
+    File records are None if the result shall not be cached.
+    """
+    cached = _load_cached_model("compiled", key)
+    if cached is not None:
+        _add_dependencies(input_files, cached[0])
+        return cached[1], cached[0]
+
+    rdlc = RDLCompiler(message_printer=_MessageMonitor())
+    for udp in udp_definitions:
+        rdlc.register_udp(udp)
+
+    with timing.phase("compile"):
+        files_read = process_input(rdlc, importers, input_files, options)
+
+    if key is None and not dependencies.is_tracking():
+        return rdlc, None
+
+    # Foreign input files are not scanned for includes
+    input_paths = set(input_files)
+    rdl_files_read = [
+        path for path in files_read
+        if path not in input_paths or os.path.splitext(path)[1].strip(".") == "rdl"
+    ]
+    included_files = _get_file_records(rdl_files_read, input_files, options.incdirs)
+    if included_files is None:
+        dependencies.mark_untrackable()
+    else:
+        dependencies.add_absent_paths(path for path, file_hash in included_files if file_hash is None)
+
+    # Do not cache results that reported warnings, otherwise they would be
+    # silently skipped on subsequent runs
+    if key is None or included_files is None or _reported_messages(rdlc):
+        return rdlc, None
+    cache.store("compiled", key, (included_files, rdlc))
+    return rdlc, included_files
+
+
+def compile_input(
+        importers: 'Sequence[Importer]',
+        input_files: List[str],
+        options: 'argparse.Namespace',
+        udp_definitions: 'Sequence[Type[UDPDefinition]]' = ()
+    ) -> 'RDLCompiler':
+    """
+    Create a new compiler and process all input files into its root namespace.
+
+    If all inputs are SystemRDL files, the compiled result is cached. It is
+    reused as long as the input files, their includes, preprocessor options,
+    UDPs and compiler version are unchanged.
+    """
+    key = _get_compile_cache_key(input_files, options, udp_definitions)
+    rdlc, _ = _compile_input(importers, input_files, options, udp_definitions, key)
+    return rdlc
+
+
+def _get_elaborate_cache_key(compile_key: Optional[str], options: 'argparse.Namespace') -> Optional[str]:
+    if compile_key is None:
+        return None
+    return cache.make_key(
+        compile_key, options.top_def_name, options.inst_name, options.parameters
+    )
+
+
+def _elaborate_input(
+        importers: 'Sequence[Importer]',
+        input_files: List[str],
+        options: 'argparse.Namespace',
+        udp_definitions: 'Sequence[Type[UDPDefinition]]',
+        compile_key: Optional[str],
+    ) -> 'Tuple[RootNode, Optional[List[Tuple[str, Optional[str]]]]]':
+    """
+    Returns the elaborated design, and the records of all files it depends on.
+    File records are None if the result shall not be cached.
+    """
+    key = _get_elaborate_cache_key(compile_key, options)
+    cached = _load_cached_model("elaborated", key)
+    if cached is not None:
+        _add_dependencies(input_files, cached[0])
+        return cached[1], cached[0]
+
+    rdlc, included_files = _compile_input(
+        importers, input_files, options, udp_definitions, compile_key
+    )
+
+    parameters = parse_parameters(rdlc, options.parameters)
+
+    with timing.phase("elaborate"):
+        root = rdlc.elaborate(
+            top_def_name=options.top_def_name,
+            inst_name=options.inst_name,
+            parameters=parameters
+        )
+
+    if key is None or included_files is None or _reported_messages(rdlc):
+        return root, None
+
+    cache.store("elaborated", key, (included_files, root))
+    return root, included_files
+
+
+def elaborate_input(
+        importers: 'Sequence[Importer]',
+        input_files: List[str],
+        options: 'argparse.Namespace',
+        udp_definitions: 'Sequence[Type[UDPDefinition]]' = ()
+    ) -> 'RootNode':
+    """
+    Compile all input files, and elaborate the top-level addrmap selected by
+    the elaboration options.
+
+    The elaborated design is cached in addition to the compiled one. It is
+    reused as long as the compiled design is, and the ``--top``, ``--rename``
+    and ``-P`` options are unchanged.
+    """
+    compile_key = _get_compile_cache_key(input_files, options, udp_definitions)
+    root, _ = _elaborate_input(importers, input_files, options, udp_definitions, compile_key)
+    return root
+
+
+def elaborate_and_derive(
+        category: str,
+        derive: 'Callable[[RootNode], T]',
+        importers: 'Sequence[Importer]',
+        input_files: List[str],
+        options: 'argparse.Namespace',
+        udp_definitions: 'Sequence[Type[UDPDefinition]]' = ()
+    ) -> T:
+    """
+    Compile and elaborate all input files like :func:`elaborate_input`, then
+    compute a result from the elaborated design using ``derive``.
+
+    The result is cached under the given category for as long as the
+    elaborated design would be. If it is, the design is not loaded at all.
+    The result must be picklable.
+    """
+    compile_key = _get_compile_cache_key(input_files, options, udp_definitions)
+    elaborate_key = _get_elaborate_cache_key(compile_key, options)
+    if elaborate_key is not None:
+        key: Optional[str] = cache.make_key(elaborate_key, category)
+    else:
+        key = None
+
+    cached = _load_cached_model(category, key)
+    if cached is not None:
+        _add_dependencies(input_files, cached[0])
+        return cached[1]
+
+    root, included_files = _elaborate_input(
+        importers, input_files, options, udp_definitions, compile_key
+    )
+    with timing.phase(f"derive {category}"):
+        result = derive(root)
+
+    if key is not None and included_files is not None:
+        cache.store(category, key, (included_files, result))
+    return result
+
+
+# Changed whenever the format of cached preprocessor results changes
+_PREPROCESS_CACHE_FORMAT = 2
+
+
+def _get_preprocess_cache_key(path: str, incdirs: Optional[List[str]], defines: Dict[str, str]) -> str:
+    return cache.make_key(
+        __version__, systemrdl_version, _PREPROCESS_CACHE_FORMAT,
+        os.path.abspath(path), cache.hash_file(path),
+        sorted(defines.items()),
+        [os.path.abspath(incdir) for incdir in incdirs or []],
+    )
+
+
+def preprocess_file(
+        rdlc: 'RDLCompiler',
+        path: str,
+        incdirs: Optional[List[str]],
+        defines: Dict[str, str],
+    ) -> Tuple[str, List[str]]:
+    """
+    Run the Perl and Verilog-style preprocessors on a file.
+
+    Returns the preprocessed text, and the paths of all included files.
+
+    The result is cached. It is reused as long as the file, its includes,
+    ``-D`` and ``-I`` options, and the compiler version are unchanged.
+    """
+    try:
+        key: Optional[str] = _get_preprocess_cache_key(path, incdirs, defines)
+    except OSError:
+        key = None
+
+    cached = _load_cached_model("preprocessed", key)
+    if cached is not None:
+        return cached[1]
+
+    f_info = rdlc.preprocess_file(path, incdirs, defines=defines)
+    included_files = list(f_info.included_files)
+    result = (f_info.preprocessed_text, included_files)
+
+    # Warnings would not be reported again if the result was cached
+    if key is not None and not _reported_messages(rdlc):
+        file_records = _get_file_records([path] + included_files, [path], incdirs)
+        if file_records is not None:
+            cache.store("preprocessed", key, (file_records, result))
+    return result
+
+
+def _get_importer_selection_key(candidates: 'Sequence[Importer]', path: str) -> str:
+    st = os.stat(path)
+    candidate_info = [
+        (imp.name, type(imp).__module__, type(imp).__qualname__, getattr(imp, "dist_version", None))
+        for imp in candidates
+    ]
+    return cache.make_key(__version__, os.path.abspath(path), st.st_mtime_ns, st.st_size, candidate_info)
+
+
+def _select_importer(candidates: 'Sequence[Importer]', path: str) -> 'Optional[Importer]':
+    """
+    Find the first candidate that is compatible with the file.
+
+    Since checking compatibility can require scanning the whole file, the
+    result is cached for as long as the file and candidates are unchanged.
+    """
+    key = _get_importer_selection_key(candidates, path)
+    name = cache.load("importer_selection", key)
+    for importer in candidates:
+        if importer.name == name:
+            return importer
+
+    # Map the file once, and let all candidates share it
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            contents: 'Union[bytes, mmap.mmap]' = b""
+        else:
+            contents = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for importer in candidates:
+                if importer.is_compatible_contents(path, contents):
+                    break
+            else:
+                return None
+        finally:
+            if isinstance(contents, mmap.mmap):
+                contents.close()
+
+    cache.store("importer_selection", key, importer.name)
+    return importer
 
 
 def load_file(
@@ -110,10 +727,12 @@ def load_file(
         defines: Dict[str, str],
         incdirs: List[str],
         options: 'argparse.Namespace'
-    ) -> None:
+    ) -> List[str]:
     """
     Careful! This is a secret API!
     sphinx-peakrdl calls this.
+
+    Returns the paths of all files that were read.
     """
 
     if not os.path.exists(path):
@@ -122,11 +741,8 @@ def load_file(
     ext = os.path.splitext(path)[1].strip(".")
     if ext == "rdl":
         # Is SystemRDL file
-        rdlc.compile_file(
-            path,
-            incl_search_paths=incdirs,
-            defines=defines,
-        )
+        f_info = rdlc.compile_file(path, incdirs, defines)
+        return [path] + list(f_info.included_files)
     else:
         # Is foreign input file.
 
@@ -138,16 +754,11 @@ def load_file(
 
         # Do 2nd pass if needed
         if len(importer_candidates) == 1:
-            importer = importer_candidates[0]
+            importer: Optional["Importer"] = importer_candidates[0]
         elif len(importer_candidates) > 1:
             # ambiguous which importer to use
             # Do 2nd pass compatibility check
-            for importer_candidate in importer_candidates:
-                if importer_candidate.is_compatible(path):
-                    importer = importer_candidate
-                    break
-            else:
-                importer = None
+            importer = _select_importer(importer_candidates, path)
         else:
             importer = None
 
@@ -159,3 +770,4 @@ def load_file(
             raise ValueError
 
         importer.do_import(rdlc, options, path)
+        return [path]
@@ -1,10 +1,11 @@
 from typing import TYPE_CHECKING, Optional, List, Type, Dict, Any
 
-from systemrdl import RDLCompiler
-
 from .config import schema
 from .config.loader import AppConfig
 from . import process_input
+from . import incremental
+from . import dependencies
+from . import timing
 
 if TYPE_CHECKING:
     import argparse
@@ -34,13 +35,16 @@ class Subcommand:
     #: For more details, see :ref:`cfg_schema`
     cfg_schema: Dict[str, Any] = {}
 
+    # Whether importer plugins need to be loaded before the subcommand runs
+    _uses_importers = True
+
     def __init__(self) -> None:
         #: Resolved configuration data that was extracted from the PeakRDL TOML,
         #: and validated.
         self.cfg: Dict[str, Any] = {}
 
     def _load_cfg(self, cfg: AppConfig) -> None:
-        self.cfg = cfg.get_namespace(self.name, schema.normalize(self.cfg_schema))
+        self.cfg = cfg.get_namespace(self.name, schema.normalize(self.cfg_schema), self)
 
     def _init_subparser(self, subgroup: 'argparse._SubParsersAction', importers: 'List[ImporterPlugin]') -> None:
         assert isinstance(self.name, str)
@@ -67,6 +71,7 @@ class Subcommand:
             dest="peakrdl_cfg",
             help="Specify a PeakRDL configuration TOML file"
         )
+        timing.add_timing_arguments(subparser)
 
 
     def add_arguments(self, parser: 'argparse._ActionsContainer', importers: 'List[ImporterPlugin]') -> None:
@@ -76,6 +81,12 @@ class Subcommand:
     def main(self, importers: 'List[ImporterPlugin]', options: 'argparse.Namespace') -> None:
         raise NotImplementedError
 
+    def _get_output_paths(self, options: 'argparse.Namespace') -> List[str]:
+        """
+        Paths of all files or directories written by the subcommand.
+        Used to check whether an incremental build is up to date.
+        """
+        return []
 
 
 class ExporterSubcommand(Subcommand):
@@ -108,6 +119,17 @@ class ExporterSubcommand(Subcommand):
 
         process_input.add_importer_arguments(parser, importers)
 
+        self._add_exporter_arg_group(parser)
+
+        incremental.add_incremental_arguments(parser)
+        dependencies.add_depfile_arguments(parser)
+
+    def _get_output_paths(self, options: 'argparse.Namespace') -> List[str]:
+        if self.generates_output_file:
+            return [options.output]
+        return []
+
+    def _add_exporter_arg_group(self, parser: 'argparse._ActionsContainer') -> None:
         exporter_arg_group = parser.add_argument_group("exporter args")
         if self.generates_output_file:
             exporter_arg_group.add_argument(
@@ -139,23 +161,13 @@ class ExporterSubcommand(Subcommand):
         """
 
     def main(self, importers: 'List[ImporterPlugin]', options: 'argparse.Namespace') -> None:
-        rdlc = RDLCompiler()
-
-        for udp in self.udp_definitions:
-            rdlc.register_udp(udp)
-
-        parameters = process_input.parse_parameters(rdlc, options.parameters)
-
-        process_input.process_input(rdlc, importers, options.input_files, options)
-
-        root = rdlc.elaborate(
-            top_def_name=options.top_def_name,
-            inst_name=options.inst_name,
-            parameters=parameters
+        root = process_input.elaborate_input(
+            importers, options.input_files, options, self.udp_definitions
         )
 
         # Run exporter
-        self.do_export(root.top, options)
+        with timing.phase("export"):
+            self.do_export(root.top, options)
 
 
     def do_export(self, top_node: 'AddrmapNode', options: 'argparse.Namespace') -> None:
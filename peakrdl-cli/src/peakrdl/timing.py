@@ -0,0 +1,148 @@
+from typing import TYPE_CHECKING, List, Optional, Iterator, Tuple, Any, Dict
+import os
+import sys
+import json
+import time
+from contextlib import contextmanager
+
+if TYPE_CHECKING:
+    import argparse
+
+# (name, nesting depth, start wall time, wall time, CPU time, peak RSS in bytes)
+PhaseRecord = Tuple[str, int, float, float, float, Optional[int]]
+
+# Phases of the running command, in the order they started. Slots of phases
+# that did not complete yet are None
+_records: List[Optional[PhaseRecord]] = []
+_enabled = False
+_depth = 0
+
+
+def add_timing_arguments(parser: 'argparse._ActionsContainer') -> None:
+    # These are lazy-parsed before argparse runs. Defining them here only
+    # documents them, and lets argparse accept them
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        default=False,
+        help="Report the wall time, CPU time and peak memory usage of each "
+            "phase of the command to stderr"
+    )
+    parser.add_argument(
+        "--timing-trace",
+        metavar="FILE",
+        dest="timing_trace",
+        default=None,
+        help="Write the timing of each phase to a Chrome trace JSON file"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        dest="profile",
+        default=None,
+        help="Profile the command, and write cProfile statistics to a file"
+    )
+
+
+def start() -> None:
+    """
+    Start recording phases of the running command
+    """
+    global _records, _enabled, _depth # pylint: disable=global-statement
+    _records = []
+    _enabled = True
+    _depth = 0
+
+
+def stop() -> List[PhaseRecord]:
+    """
+    Stop recording, and return all phases that completed
+    """
+    global _records, _enabled # pylint: disable=global-statement
+    assert _enabled
+    records = [record for record in _records if record is not None]
+    _records = []
+    _enabled = False
+    return records
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _get_peak_rss() -> Optional[int]:
+    try:
+        import resource # pylint: disable=import-outside-toplevel
+    except ImportError:
+        # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak
+    # Other platforms report kilobytes
+    return peak * 1024
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Record the wall time, CPU time and peak memory usage of a phase.
+    Phases can be nested. Does nothing if timing is disabled.
+    """
+    global _depth # pylint: disable=global-statement
+    if not _enabled:
+        yield
+        return
+
+    # Reserve the slot so that phases are listed in the order they started
+    records = _records
+    idx = len(records)
+    records.append(None)
+    depth = _depth
+    _depth += 1
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        _depth = depth
+        records[idx] = (
+            name, depth, wall_start,
+            time.perf_counter() - wall_start,
+            time.process_time() - cpu_start,
+            _get_peak_rss(),
+        )
+
+
+def format_report(records: List[PhaseRecord]) -> str:
+    name_width = max([len("phase")] + [2 * depth + len(name) for name, depth, *_ in records])
+    lines = [f"{'phase':<{name_width}}  {'wall':>9}  {'cpu':>9}  {'peak RSS':>10}"]
+    for name, depth, _, wall, cpu, peak_rss in records:
+        indented_name = "  " * depth + name
+        if peak_rss is None:
+            rss = "-"
+        else:
+            rss = f"{peak_rss / (1 << 20):.1f} MiB"
+        lines.append(f"{indented_name:<{name_width}}  {wall:>8.3f}s  {cpu:>8.3f}s  {rss:>10}")
+    return "\n".join(lines) + "\n"
+
+
+def write_chrome_trace(path: str, records: List[PhaseRecord]) -> None:
+    """
+    Write phases in the Trace Event format that can be viewed with
+    chrome://tracing or Perfetto
+    """
+    pid = os.getpid()
+    events: List[Dict[str, Any]] = []
+    for name, _, wall_start, wall, cpu, peak_rss in records:
+        events.append({
+            "name": name,
+            "ph": "X",
+            "ts": wall_start * 1e6,
+            "dur": wall * 1e6,
+            "pid": pid,
+            "tid": 0,
+            "args": {"cpu_s": cpu, "peak_rss": peak_rss},
+        })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
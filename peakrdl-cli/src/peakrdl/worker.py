@@ -0,0 +1,89 @@
+"""
+Helpers for executing PeakRDL commands inside an already running process,
+such as the forked workers of 'peakrdl serve' and 'peakrdl batch'.
+"""
+from typing import List, Dict, Callable, Optional, Iterator
+import sys
+import gc
+import traceback
+import contextlib
+
+from .subcommand import Subcommand
+from .config.loader import AppConfig
+from .plugins.exporter import LazyExporterSubcommandPlugin
+from .plugins.importer import get_importer_plugins
+
+
+class CommandRunnerSubcommand(Subcommand):
+    """
+    Base class for subcommands that execute other PeakRDL commands in forked
+    copies of this process.
+    """
+
+    _uses_importers = False
+
+    def __init__(self, subcommands: Dict[str, Subcommand], entry_point: Callable[[], None]) -> None:
+        super().__init__()
+        # Mapping of all available subcommands, so that they can be preloaded
+        self.subcommands = subcommands
+        # Function that executes a command based on sys.argv
+        self.entry_point = entry_point
+        self.app_cfg: Optional[AppConfig] = None
+
+    def _load_cfg(self, cfg: AppConfig) -> None:
+        super()._load_cfg(cfg)
+        # Needed to preload importers
+        self.app_cfg = cfg
+
+    def preload_plugins(self) -> None:
+        """
+        Import all exporter and importer plugins, so that commands that run in
+        forked copies of this process do not have to.
+        """
+        assert self.app_cfg is not None
+        for subcommand in self.subcommands.values():
+            if isinstance(subcommand, LazyExporterSubcommandPlugin):
+                subcommand.load()
+        get_importer_plugins(self.app_cfg)
+
+
+@contextlib.contextmanager
+def frozen_gc() -> Iterator[None]:
+    """
+    Keep the garbage collector away from all objects allocated so far while
+    forking workers.
+    """
+    # Move everything allocated so far out of the GC's reach so that workers
+    # do not needlessly copy the parent's memory pages
+    gc.collect()
+    gc.freeze()
+    try:
+        yield
+    finally:
+        gc.unfreeze()
+
+
+def run_command(entry_point: Callable[[], None], argv: List[str]) -> int:
+    """
+    Execute a command by calling entry_point() with the given args as
+    sys.argv, and return its exit code.
+    """
+    sys.argv = ["peakrdl"] + argv
+    try:
+        entry_point()
+    except SystemExit as e:
+        return get_exit_code(e)
+    except Exception: # pylint: disable=broad-exception-caught
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def get_exit_code(e: SystemExit) -> int:
+    # Mimics how the interpreter converts the argument of sys.exit()
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
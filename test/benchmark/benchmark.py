@@ -0,0 +1,340 @@
+"""
+Benchmarks of the PeakRDL command line tool.
+
+Generates synthetic register maps of scaled size, then times each phase of
+several peakrdl commands on them. Every command runs in a fresh process with
+caching disabled, so that each measurement includes the full cost of the
+command, as a user would see it.
+
+Results are saved as JSON, and can be compared against a previous run in order
+to detect regressions between releases:
+
+    python benchmark.py --scale medium -o results/v1.1.json
+    python benchmark.py --scale medium -o results/v1.2.json --compare results/v1.1.json
+"""
+from typing import List, Dict, Any, Tuple
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+
+from systemrdl import __version__ as systemrdl_version
+
+from peakrdl.__about__ import __version__
+from peakrdl.config.loader import load_cfg
+from peakrdl.plugins.exporter import get_exporter_plugins
+from peakrdl.plugins.entry_points import get_plugin_entry_points
+
+# Design sizes for each scale:
+#   (flat register count, array register count, hierarchy depth, hierarchy width)
+SCALES = {
+    "small": (1000, 1000, 3, 4),
+    "medium": (10000, 100000, 5, 4),
+    "large": (10000, 1000000, 8, 4),
+}
+
+# Output file extension of exporters that write a single file.
+# All other exporters are given a directory.
+EXPORTER_EXTENSIONS = {
+    "c-header": "h",
+    "ip-xact": "xml",
+    "systemrdl": "rdl",
+    "uvm": "sv",
+}
+
+# Differences in measurements shorter than this are considered noise
+NOISE_FLOOR = 0.05
+
+REG_DEF = """\
+    reg r_t {
+        field { sw=rw; hw=r; } f1[8] = 0;
+        field { sw=r; hw=w; } f2[8];
+        field { sw=rw; hw=r; onwrite=woclr; } f3[16] = 0;
+    };
+"""
+
+
+#-------------------------------------------------------------------------------
+# Synthetic designs
+#-------------------------------------------------------------------------------
+def write_flat_design(path: str, name: str, n_regs: int) -> None:
+    """
+    Many individually instantiated registers
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"addrmap {name} {{\n")
+        f.write(REG_DEF)
+        for i in range(n_regs):
+            f.write(f"    r_t r{i};\n")
+        f.write("};\n")
+
+
+def write_array_design(path: str, name: str, n_regs: int) -> None:
+    """
+    A wide array of registers, next to a few ordinary ones
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"addrmap {name} {{\n")
+        f.write(REG_DEF)
+        f.write("    r_t ctrl;\n")
+        f.write(f"    r_t regs[{n_regs}];\n")
+        f.write("    r_t status;\n")
+        f.write("};\n")
+
+
+def write_deep_design(path: str, name: str, depth: int, width: int) -> None:
+    """
+    Deeply nested arrays of regfiles
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(REG_DEF)
+        f.write("regfile l0_t { r_t a; r_t b[2]; };\n")
+        for level in range(1, depth):
+            f.write(f"regfile l{level}_t {{ r_t c; l{level-1}_t sub[{width}]; }};\n")
+        f.write(f"addrmap {name} {{ l{depth-1}_t rf[{width}]; }};\n")
+
+
+def generate_designs(work_dir: str, scale: str) -> Dict[str, str]:
+    """
+    Returns the path of each design, by name
+    """
+    n_flat, n_array, depth, width = SCALES[scale]
+    designs = {
+        f"flat_{n_flat}": (write_flat_design, (n_flat,)),
+        f"array_{n_array}": (write_array_design, (n_array,)),
+        f"deep_{depth}x{width}": (write_deep_design, (depth, width)),
+    }
+    paths = {}
+    for name, (writer, args) in designs.items():
+        path = os.path.join(work_dir, f"{name}.rdl")
+        writer(path, name, *args) # type: ignore
+        paths[name] = path
+    return paths
+
+
+#-------------------------------------------------------------------------------
+# Measurements
+#-------------------------------------------------------------------------------
+def run_peakrdl(args: List[str], work_dir: str, env: Dict[str, str]) -> Tuple[float, Dict[str, float]]:
+    """
+    Run a peakrdl command in a new process.
+
+    Returns the total wall time, and the wall time of each phase that the
+    command reported.
+    """
+    trace_path = os.path.join(work_dir, "trace.json")
+    if os.path.exists(trace_path):
+        os.remove(trace_path)
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "peakrdl", *args, "--timing-trace", trace_path],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True,
+        env=env, check=False,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+
+    phases: Dict[str, float] = {}
+    if os.path.exists(trace_path):
+        with open(trace_path, encoding="utf-8") as f:
+            for event in json.load(f)["traceEvents"]:
+                # Group per-file phases together
+                name = event["name"].split(" ", 1)[0] if event["name"].startswith(("load ", "link ")) else event["name"]
+                phases[name] = phases.get(name, 0.0) + event["dur"] / 1e6
+    return wall, phases
+
+
+def measure(args: List[str], work_dir: str, env: Dict[str, str], repeat: int) -> Dict[str, Any]:
+    """
+    Run a command several times, and keep the fastest run
+    """
+    best_wall = float("inf")
+    best_phases: Dict[str, float] = {}
+    for _ in range(repeat):
+        try:
+            wall, phases = run_peakrdl(args, work_dir, env)
+        except RuntimeError as e:
+            return {"error": str(e)}
+        if wall < best_wall:
+            best_wall, best_phases = wall, phases
+    return {"wall": best_wall, "phases": best_phases}
+
+
+def get_exporter_names() -> List[str]:
+    return sorted(
+        exporter.name for exporter in get_exporter_plugins(load_cfg(None))
+    )
+
+
+def get_output_path(out_dir: str, exporter: str, design: str) -> str:
+    if exporter in EXPORTER_EXTENSIONS:
+        return os.path.join(out_dir, f"{design}.{EXPORTER_EXTENSIONS[exporter]}")
+    return out_dir
+
+
+def run_benchmarks(work_dir: str, scale: str, repeat: int, exporters: List[str]) -> Dict[str, Dict[str, Any]]:
+    env = dict(os.environ)
+    env.pop("PEAKRDL_SERVER", None)
+    env["PEAKRDL_NO_CACHE"] = "1"
+
+    cached_env = dict(env)
+    del cached_env["PEAKRDL_NO_CACHE"]
+    cached_env["PEAKRDL_CACHE_DIR"] = os.path.join(work_dir, "cache")
+
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def bench(key: str, args: List[str], bench_env: Dict[str, str]) -> None:
+        print(f"{key} ...", end=" ", flush=True, file=sys.stderr)
+        results[key] = measure(args, work_dir, bench_env, repeat)
+        if "error" in results[key]:
+            print(f"error: {results[key]['error']}", file=sys.stderr)
+        else:
+            print(f"{results[key]['wall']:.3f}s", file=sys.stderr)
+
+    bench("startup/version", ["--version"], env)
+    bench("startup/plugin_discovery", ["--plugins"], env)
+    measure(["--plugins"], work_dir, cached_env, 1)
+    bench("startup/plugin_discovery_cached", ["--plugins"], cached_env)
+    measure(["--help"], work_dir, cached_env, 1)
+    bench("startup/help_cached", ["--help"], cached_env)
+
+    for design, path in generate_designs(work_dir, scale).items():
+        # Compile and elaborate are reported as phases of each command. Dump
+        # without any options adds the least on top of them.
+        bench(f"{design}/dump", ["dump", path], env)
+        bench(f"{design}/dump_unroll", ["dump", path, "-u", "-F"], env)
+
+        # Populate the cache first, then measure a cached run
+        measure(["dump", path], work_dir, cached_env, 1)
+        bench(f"{design}/dump_cached", ["dump", path], cached_env)
+
+        for exporter in exporters:
+            out_dir = os.path.join(work_dir, "out", design, exporter)
+            os.makedirs(out_dir, exist_ok=True)
+            bench(
+                f"{design}/{exporter}",
+                [exporter, path, "-o", get_output_path(out_dir, exporter, design)],
+                env,
+            )
+            shutil.rmtree(out_dir, ignore_errors=True)
+    return results
+
+
+#-------------------------------------------------------------------------------
+# Results
+#-------------------------------------------------------------------------------
+def get_metadata(scale: str) -> Dict[str, Any]:
+    plugins = {}
+    for group in ("peakrdl.importers", "peakrdl.exporters"):
+        for ep, _, dist_version in get_plugin_entry_points(group):
+            plugins[ep.name] = dist_version
+    return {
+        "peakrdl": __version__,
+        "systemrdl": systemrdl_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scale": scale,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "plugins": plugins,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """
+    Print how each measurement changed relative to the baseline.
+    Returns the measurements that regressed by more than the threshold.
+    """
+    regressions = []
+    print(f"{'benchmark':<40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key, result in results.items():
+        if key not in baseline or "wall" not in result or "wall" not in baseline[key]:
+            continue
+        old = baseline[key]["wall"]
+        new = result["wall"]
+        change = (new - old) / old
+        flag = ""
+        if change > threshold and new - old > NOISE_FLOOR:
+            regressions.append(key)
+            flag = " !"
+        print(f"{key:<40} {old:>9.3f}s {new:>9.3f}s {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--scale",
+        choices=list(SCALES.keys()),
+        default="small",
+        help="Size of the synthetic designs (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Run each benchmark N times, and keep the fastest (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--exporter",
+        dest="exporters",
+        action="append",
+        default=None,
+        help="Only benchmark this exporter. Can be specified multiple times. "
+            "By default, all installed exporters are benchmarked"
+    )
+    parser.add_argument(
+        "--work-dir",
+        default=os.path.join(os.path.dirname(__file__), "bench.out"),
+        help="Directory for generated designs and outputs (default: %(default)s)"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Save results to this JSON file"
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="BASELINE",
+        default=None,
+        help="Compare results against a previously saved JSON file. "
+            "Exits with an error if any benchmark regressed"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown that is considered a regression (default: %(default)s)"
+    )
+    options = parser.parse_args()
+
+    os.makedirs(options.work_dir, exist_ok=True)
+    exporters = options.exporters or get_exporter_names()
+    results = run_benchmarks(options.work_dir, options.scale, options.repeat, exporters)
+
+    if options.output:
+        output_dir = os.path.dirname(options.output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": get_metadata(options.scale), "results": results}, f, indent=2)
+
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("scale") != options.scale:
+            print("warning: baseline was measured at a different scale", file=sys.stderr)
+        regressions = compare(results, baseline["results"], options.threshold)
+        if regressions:
+            print(f"error: {len(regressions)} benchmark(s) regressed", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
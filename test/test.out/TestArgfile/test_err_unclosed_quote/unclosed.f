@@ -0,0 +1 @@
+dump "testdata/parameters.rdl
@@ -0,0 +1,3 @@
+${{this_dir}}/blocks/**/*.rdl
+'${{this_dir}}/blocks/*.rdl'
+${{this_dir}}/blocks/*.none
@@ -0,0 +1,4 @@
+# comment
+a b#comment
+'single $PEAKRDL_UNSET_TEST_VAR # not a comment' "double \" \\ \x"
+escaped\ space '' mi'x'"ed"
@@ -0,0 +1,7 @@
+from peakrdl.plugins.exporter import ExporterSubcommandPlugin
+class LocalExporter(ExporterSubcommandPlugin):
+    short_desc = 'local exporter'
+    def do_export(self, top_node, options):
+        with open(options.output, 'w', encoding='utf-8') as f:
+            f.write(top_node.inst_name)
+# edited
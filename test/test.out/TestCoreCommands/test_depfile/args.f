@@ -0,0 +1 @@
+c-header /root/package/test/testdata/structural.rdl -o /root/package/test/test.out/TestCoreCommands/test_depfile/out.h
\ No newline at end of file
@@ -0,0 +1,117 @@
+// Generated by PeakRDL-cheader - A free and open-source header generator
+//  https://github.com/SystemRDL/PeakRDL-cheader
+
+#ifndef STRUCTURAL_H
+#define STRUCTURAL_H
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+#include <stdint.h>
+#include <assert.h>
+
+// reg - regblock::my_reg_a_217c582f
+#define REGBLOCK__MY_REG_A_217C582F__A_bm 0xff
+#define REGBLOCK__MY_REG_A_217C582F__A_bp 0
+#define REGBLOCK__MY_REG_A_217C582F__A_bw 8
+#define REGBLOCK__MY_REG_A_217C582F__A_reset 0x42
+#define REGBLOCK__MY_REG_A_217C582F__B_bm 0x100
+#define REGBLOCK__MY_REG_A_217C582F__B_bp 8
+#define REGBLOCK__MY_REG_A_217C582F__B_bw 1
+#define REGBLOCK__MY_REG_A_217C582F__B_reset 0x0
+#define REGBLOCK__MY_REG_A_217C582F__C_bm 0x80000000
+#define REGBLOCK__MY_REG_A_217C582F__C_bp 31
+#define REGBLOCK__MY_REG_A_217C582F__C_bw 1
+#define REGBLOCK__MY_REG_A_217C582F__C_reset 0x1
+
+// reg - regblock::my_reg
+#define REGBLOCK__MY_REG__A_bm 0xff
+#define REGBLOCK__MY_REG__A_bp 0
+#define REGBLOCK__MY_REG__A_bw 8
+#define REGBLOCK__MY_REG__A_reset 0x23
+#define REGBLOCK__MY_REG__B_bm 0x100
+#define REGBLOCK__MY_REG__B_bp 8
+#define REGBLOCK__MY_REG__B_bw 1
+#define REGBLOCK__MY_REG__B_reset 0x0
+#define REGBLOCK__MY_REG__C_bm 0x80000000
+#define REGBLOCK__MY_REG__C_bp 31
+#define REGBLOCK__MY_REG__C_bw 1
+#define REGBLOCK__MY_REG__C_reset 0x1
+
+// reg - regblock::my_reg_a_7f59850b
+#define REGBLOCK__MY_REG_A_7F59850B__A_bm 0xff
+#define REGBLOCK__MY_REG_A_7F59850B__A_bp 0
+#define REGBLOCK__MY_REG_A_7F59850B__A_bw 8
+#define REGBLOCK__MY_REG_A_7F59850B__A_reset 0x11
+#define REGBLOCK__MY_REG_A_7F59850B__B_bm 0x100
+#define REGBLOCK__MY_REG_A_7F59850B__B_bp 8
+#define REGBLOCK__MY_REG_A_7F59850B__B_bw 1
+#define REGBLOCK__MY_REG_A_7F59850B__B_reset 0x0
+#define REGBLOCK__MY_REG_A_7F59850B__C_bm 0x80000000
+#define REGBLOCK__MY_REG_A_7F59850B__C_bp 31
+#define REGBLOCK__MY_REG_A_7F59850B__C_bw 1
+#define REGBLOCK__MY_REG_A_7F59850B__C_reset 0x1
+
+// reg - regblock::subreg
+#define REGBLOCK__SUBREG__X_bm 0xf0
+#define REGBLOCK__SUBREG__X_bp 4
+#define REGBLOCK__SUBREG__X_bw 4
+#define REGBLOCK__SUBREG__X_reset 0x1
+
+// regfile - regblock::subrf::sub
+typedef struct __attribute__ ((__packed__)) {
+    uint32_t r1;
+    uint32_t r2[2];
+    uint32_t r3;
+} regblock__subrf__sub_t;
+
+// regfile - regblock::subrf
+typedef struct __attribute__ ((__packed__)) {
+    uint32_t r1[4];
+    regblock__subrf__sub_t sub[2];
+    uint32_t r2[4];
+} regblock__subrf_t;
+
+// reg - regblock::rw_reg
+#define REGBLOCK__RW_REG__F1_bm 0xff000
+#define REGBLOCK__RW_REG__F1_bp 12
+#define REGBLOCK__RW_REG__F1_bw 8
+#define REGBLOCK__RW_REG__F1_reset 0x0
+#define REGBLOCK__RW_REG__F2_bm 0x7ff00000
+#define REGBLOCK__RW_REG__F2_bp 20
+#define REGBLOCK__RW_REG__F2_bw 11
+#define REGBLOCK__RW_REG__F2_reset 0x0
+
+// reg - regblock::rw_reg_lsb0
+#define REGBLOCK__RW_REG_LSB0__F1_bm 0xff000
+#define REGBLOCK__RW_REG_LSB0__F1_bp 12
+#define REGBLOCK__RW_REG_LSB0__F1_bw 8
+#define REGBLOCK__RW_REG_LSB0__F1_reset 0x0
+#define REGBLOCK__RW_REG_LSB0__F2_bm 0x7ff00000
+#define REGBLOCK__RW_REG_LSB0__F2_bp 20
+#define REGBLOCK__RW_REG_LSB0__F2_bw 11
+#define REGBLOCK__RW_REG_LSB0__F2_reset 0x0
+
+// addrmap - regblock
+typedef struct __attribute__ ((__packed__)) {
+    uint32_t r0;
+    uint8_t RESERVED_4_f[0xc];
+    uint32_t r1[2][3][4];
+    uint8_t RESERVED_70_fff[0xf90];
+    uint32_t r2;
+    uint8_t RESERVED_1004_1fff[0xffc];
+    regblock__subrf_t sub2[2];
+    uint32_t r3;
+    uint8_t RESERVED_2084_2fff[0xf7c];
+    uint32_t rw_reg;
+    uint32_t rw_reg_lsb0;
+} regblock_t;
+
+
+static_assert(sizeof(regblock_t) == 0x3008, "Packing error");
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif /* STRUCTURAL_H */
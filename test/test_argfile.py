@@ -1,4 +1,6 @@
 import os
+
+from peakrdl.argfile import parse_argfile
 from unittest_utils import PeakRDLTestcase
 
 class TestArgfile(PeakRDLTestcase):
@@ -40,3 +42,52 @@ class TestArgfile(PeakRDLTestcase):
         self.run_commandline([
             '-f', os.path.join(self.testdata_dir, "circular.f"),
         ], expects_error=True)
+
+    def test_err_unclosed_quote(self):
+        path = os.path.join(self.get_output_dir(), "unclosed.f")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('dump "testdata/parameters.rdl\n')
+        self.run_commandline([
+            '-f', path,
+        ], expects_error=True)
+
+    def test_quoting(self):
+        path = os.path.join(self.get_output_dir(), "quoting.f")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(
+                "# comment\n"
+                "a b#comment\n"
+                "'single $PEAKRDL_UNSET_TEST_VAR # not a comment' \"double \\\" \\\\ \\x\"\n"
+                "escaped\\ space '' mi'x'\"ed\"\n"
+            )
+        self.assertEqual(parse_argfile(path), [
+            "a", "b",
+            "single  # not a comment", 'double " \\ \\x',
+            "escaped space", "", "mixed",
+        ])
+
+    def test_glob(self):
+        out_dir = self.get_output_dir()
+        for rel_path in ["a.rdl", "sub/b.rdl", "sub/deeper/c.rdl", "sub/d.xml"]:
+            path = os.path.join(out_dir, "blocks", rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("")
+        path = os.path.join(out_dir, "glob.f")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(
+                "${{this_dir}}/blocks/**/*.rdl\n"
+                "'${{this_dir}}/blocks/*.rdl'\n"
+                "${{this_dir}}/blocks/*.none\n"
+            )
+        blocks_dir = os.path.join(out_dir, "blocks")
+        self.assertEqual(parse_argfile(path), [
+            os.path.join(blocks_dir, "a.rdl"),
+            os.path.join(blocks_dir, "sub", "b.rdl"),
+            os.path.join(blocks_dir, "sub", "deeper", "c.rdl"),
+            # Quoted patterns are not expanded
+            os.path.join(blocks_dir, "*.rdl"),
+            # Patterns that match nothing are kept as-is
+            os.path.join(blocks_dir, "*.none"),
+        ])
+
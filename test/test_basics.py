@@ -1,4 +1,8 @@
 import os
+import sys
+import subprocess
+from unittest.mock import patch
+
 from unittest_utils import PeakRDLTestcase
 
 class TestBasics(PeakRDLTestcase):
@@ -17,6 +21,112 @@ class TestBasics(PeakRDLTestcase):
         self.assertIn("regblock", captured.out)
         self.assertIn("html", captured.out)
 
+    def test_lazy_plugins(self):
+        # Running a subcommand shall not import unrelated exporter plugins
+        script = "; ".join([
+            "import sys",
+            "from peakrdl.main import main",
+            f"sys.argv = ['peakrdl', 'dump', {os.path.join(self.testdata_dir, 'structural.rdl')!r}]",
+            "main()",
+            "print('LOADED:', 'peakrdl_html' in sys.modules, 'peakrdl_regblock' in sys.modules)",
+        ])
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            stdout=subprocess.PIPE, universal_newlines=True, check=True
+        )
+        self.assertIn("LOADED: False False", result.stdout)
+
+    def test_lazy_help(self):
+        # Once descriptions are cached, top-level help shall not import any exporter plugins
+        script = "; ".join([
+            "import sys",
+            "from peakrdl.main import main",
+            "sys.argv = ['peakrdl', '--help']",
+            "main()",
+        ])
+        check_script = "\n".join([
+            "import sys, contextlib, io",
+            "from peakrdl.main import main",
+            "sys.argv = ['peakrdl', '--help']",
+            "f = io.StringIO()",
+            "with contextlib.suppress(SystemExit), contextlib.redirect_stdout(f):",
+            "    main()",
+            "print('HELP:', f.getvalue())",
+            "print('LOADED:', 'peakrdl_html' in sys.modules, 'peakrdl_regblock' in sys.modules)",
+        ])
+        subprocess.run(
+            [sys.executable, "-c", script],
+            stdout=subprocess.DEVNULL, check=True
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", check_script],
+            stdout=subprocess.PIPE, universal_newlines=True, check=True
+        )
+        self.assertIn("LOADED: False False", result.stdout)
+        self.assertIn("regblock", result.stdout)
+        self.assertIn("HTML", result.stdout)
+
+    def test_legacy_entry_point(self):
+        # Python 3.7 discovers plugins with pkg_resources, whose entry points
+        # have no 'value' attribute
+        class LegacyEntryPoint:
+            name = "legacy"
+            module_name = "dummy_exporter"
+            attrs = ("DummyExporter",)
+            def load(self):
+                sys.path.insert(0, PeakRDLTestcase.testdata_dir)
+                try:
+                    from dummy_exporter import DummyExporter
+                finally:
+                    sys.path.remove(PeakRDLTestcase.testdata_dir)
+                return DummyExporter
+
+        eps = [(LegacyEntryPoint(), "legacy-plugin", "1.0")]
+        with patch("peakrdl.plugins.exporter.get_plugin_entry_points", return_value=eps):
+            with self.subTest("help"):
+                self.run_commandline(['-h'])
+                self.assertIn("dummy command", self.capsys.readouterr().out)
+            with self.subTest("no subcommand"):
+                self.run_commandline([], expects_error=True)
+            with self.subTest("unknown subcommand"):
+                self.run_commandline(['legacyy'], expects_error=True)
+
+    def test_plugin_discovery_cache(self):
+        from peakrdl.plugins.entry_points import get_plugin_entry_points
+        uncached = get_plugin_entry_points("peakrdl.exporters")
+        cached = get_plugin_entry_points("peakrdl.exporters")
+        self.assertEqual(
+            [(ep.name, ep.value, name, version) for ep, name, version in uncached],
+            [(ep.name, ep.value, name, version) for ep, name, version in cached],
+        )
+        self.assertTrue(os.path.isdir(os.path.join(os.environ["PEAKRDL_CACHE_DIR"], "entry_points")))
+
+    def test_plugin_discovery_fingerprint(self):
+        from peakrdl.plugins import entry_points
+        site_dir = os.path.join(self.get_output_dir(), "site")
+        ep_path = os.path.join(site_dir, "fake_plugin-1.0.dist-info", "entry_points.txt")
+        os.makedirs(os.path.dirname(ep_path), exist_ok=True)
+        with open(ep_path, "w", encoding="utf-8") as f:
+            f.write("[peakrdl.exporters]\n")
+
+        cwd = os.getcwd()
+        os.chdir(self.get_output_dir())
+        try:
+            with patch("sys.path", [site_dir, os.getcwd()]):
+                fingerprint = entry_points._get_dist_fingerprint()
+
+                with self.subTest("cwd is ignored"):
+                    with open("scratch.txt", "w", encoding="utf-8") as f:
+                        f.write("")
+                    self.assertEqual(entry_points._get_dist_fingerprint(), fingerprint)
+
+                with self.subTest("entry points rewritten"):
+                    st = os.stat(ep_path)
+                    os.utime(ep_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000))
+                    self.assertNotEqual(entry_points._get_dist_fingerprint(), fingerprint)
+        finally:
+            os.chdir(cwd)
+
     def test_parameter_override(self):
         with self.subTest("good"):
             self.run_commandline([
@@ -0,0 +1,345 @@
+import os
+import sys
+import glob
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from unittest_utils import PeakRDLTestcase
+
+class TestCache(PeakRDLTestcase):
+    @pytest.fixture(autouse=True)
+    def _isolated_cache(self, request):
+        # Each testcase starts with an empty cache
+        self.request = request
+        cache_dir = os.path.join(self.get_output_dir(), "cache")
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        with patch.dict(os.environ, {"PEAKRDL_CACHE_DIR": cache_dir}):
+            yield
+
+    def write_file(self, path: str, text: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def get_cache_entries(self, category: str):
+        return glob.glob(os.path.join(os.environ["PEAKRDL_CACHE_DIR"], category, "*.pkl"))
+
+    def test_compile_cache(self):
+        path = self.get_output_dir()
+        self.write_file(os.path.join(path, "incl.rdl"), "reg my_reg { field {} a; };")
+        self.write_file(
+            os.path.join(path, "top.rdl"),
+            '`include "incl.rdl"\naddrmap top { my_reg r1; };\n'
+        )
+
+        def dump():
+            self.run_commandline([
+                'dump', os.path.join(path, "top.rdl"), "-F",
+            ])
+            return self.capsys.readouterr().out
+
+        with self.subTest("miss"):
+            self.assertEqual(dump(), "0x0-0x3: top.r1\n\t[0:0] a\n")
+            entries = self.get_cache_entries("compiled")
+            self.assertTrue(entries)
+
+        with self.subTest("hit"):
+            self.assertEqual(dump(), "0x0-0x3: top.r1\n\t[0:0] a\n")
+            self.assertEqual(self.get_cache_entries("compiled"), entries)
+
+        with self.subTest("include changed"):
+            self.write_file(os.path.join(path, "incl.rdl"), "reg my_reg { field {} a; field {} b; };")
+            self.assertEqual(dump(), "0x0-0x3: top.r1\n\t[0:0] a\n\t[1:1] b\n")
+
+        with self.subTest("defines"):
+            self.run_commandline([
+                'dump', os.path.join(path, "top.rdl"), "-D", "FOO=1",
+            ])
+            self.capsys.readouterr()
+            self.assertGreater(len(self.get_cache_entries("compiled")), len(entries))
+
+    def test_compile_cache_include_shadowed(self):
+        path = self.get_output_dir()
+        incdir = os.path.join(path, "incdir")
+        shutil.rmtree(incdir, ignore_errors=True)
+        os.makedirs(incdir)
+        self.write_file(os.path.join(path, "incl.rdl"), "reg my_reg { field {} a; };")
+        self.write_file(
+            os.path.join(path, "top.rdl"),
+            '`include "incl.rdl"\naddrmap top { my_reg r1; };\n'
+        )
+
+        def dump():
+            self.run_commandline([
+                'dump', os.path.join(path, "top.rdl"), "-F", "-I", incdir,
+            ])
+            return self.capsys.readouterr().out
+
+        self.assertEqual(dump(), "0x0-0x3: top.r1\n\t[0:0] a\n")
+
+        # A new file that is found first in the search path is picked up
+        self.write_file(os.path.join(incdir, "incl.rdl"), "reg my_reg { field {} b; };")
+        self.assertEqual(dump(), "0x0-0x3: top.r1\n\t[0:0] b\n")
+
+    def test_compile_cache_perl(self):
+        path = self.get_output_dir()
+        self.write_file(
+            os.path.join(path, "top.rdl"),
+            "addrmap top { <% for(my $i = 0; $i < 2; $i++) { %> reg { field {} a; } r<%=$i%>; <% } %> };\n"
+        )
+        self.run_commandline(['dump', os.path.join(path, "top.rdl")])
+        self.assertEqual(self.capsys.readouterr().out, "0x0-0x3: top.r0\n0x4-0x7: top.r1\n")
+
+        # Perl snippets can depend on anything, so the result is not cached
+        self.assertEqual(self.get_cache_entries("compiled"), [])
+        self.assertEqual(self.get_cache_entries("elaborated"), [])
+
+    def test_prune(self):
+        from peakrdl import cache
+        for i in range(4):
+            cache.store("test", f"entry{i}", b"x" * 1000)
+            path = os.path.join(os.environ["PEAKRDL_CACHE_DIR"], "test", f"entry{i}.pkl")
+            os.utime(path, (i, i))
+        # Loading an entry marks it as recently used
+        self.assertIsNotNone(cache.load("test", "entry0"))
+
+        cache.prune(2500)
+        self.assertIsNotNone(cache.load("test", "entry0"))
+        self.assertIsNotNone(cache.load("test", "entry3"))
+        self.assertIsNone(cache.load("test", "entry1"))
+        self.assertIsNone(cache.load("test", "entry2"))
+
+    def test_elaborate_cache(self):
+        def dump(*args):
+            self.run_commandline([
+                'dump', os.path.join(self.testdata_dir, "parameters.rdl"), *args
+            ])
+            return self.capsys.readouterr().out
+
+        uncached = dump("--top", "elab_params", "-P", "INT=2")
+        self.assertEqual(len(self.get_cache_entries("elaborated")), 1)
+        self.assertEqual(dump("--top", "elab_params", "-P", "INT=2"), uncached)
+        self.assertEqual(len(self.get_cache_entries("elaborated")), 1)
+
+        # Different elaboration options are cached separately
+        dump("--top", "elab_params", "-P", "INT=3")
+        dump("--top", "nested", "--rename", "foo")
+        self.assertEqual(len(self.get_cache_entries("elaborated")), 3)
+        self.assertEqual(len(self.get_cache_entries("compiled")), 1)
+
+        # Elaborated designs are evicted like any other entry
+        from peakrdl import cache
+        dump("--top", "nested", "--rename", "foo")
+        newest = max(self.get_cache_entries("elaborated"), key=os.path.getmtime)
+        cache.prune(os.path.getsize(newest))
+        self.assertEqual(self.get_cache_entries("elaborated"), [newest])
+        self.assertEqual(self.get_cache_entries("compiled"), [])
+
+    def test_incremental(self):
+        path = self.get_output_dir()
+        self.write_file(os.path.join(path, "incl.rdl"), "reg my_reg { field {} a; };")
+        self.write_file(
+            os.path.join(path, "top.rdl"),
+            '`include "incl.rdl"\naddrmap top { my_reg r1; };\n'
+        )
+
+        output = os.path.join(path, "dump.txt")
+
+        if os.path.exists(output):
+            os.remove(output)
+
+        def dump():
+            # Returns whether the command ran
+            mtime = os.stat(output).st_mtime_ns if os.path.exists(output) else None
+            self.run_commandline([
+                'dump', os.path.join(path, "top.rdl"), "-o", output, "--incremental",
+            ])
+            return os.stat(output).st_mtime_ns != mtime
+
+        self.assertTrue(dump())
+        # Nothing changed. Command is skipped
+        self.assertFalse(dump())
+
+        # Touching an input without changing it is not a change
+        os.utime(os.path.join(path, "incl.rdl"))
+        self.assertFalse(dump())
+
+        self.write_file(os.path.join(path, "incl.rdl"), "reg my_reg { field {} a; field {} b; };")
+        self.assertTrue(dump())
+        self.assertFalse(dump())
+
+        # Commands that print their output are never skipped
+        args = ['dump', os.path.join(path, "top.rdl"), "--incremental"]
+        for _ in range(2):
+            self.run_commandline(args)
+            self.assertEqual(self.capsys.readouterr().out, "0x0-0x3: top.r1\n")
+
+    def test_incremental_outputs(self):
+        output = os.path.join(self.get_output_dir(), "out.h")
+
+        def export():
+            self.run_commandline([
+                'c-header', os.path.join(self.testdata_dir, "structural.rdl"),
+                "-o", output, "--incremental",
+            ])
+            return os.stat(output).st_mtime_ns
+
+        mtime = export()
+        self.assertEqual(export(), mtime)
+
+        # Modified or deleted outputs are regenerated
+        self.write_file(output, "")
+        export()
+        self.assertGreater(os.path.getsize(output), 0)
+        os.remove(output)
+        export()
+        self.assertTrue(os.path.exists(output))
+
+    def test_incremental_include_shadowed(self):
+        path = self.get_output_dir()
+        incdir = os.path.join(path, "incdir")
+        shutil.rmtree(incdir, ignore_errors=True)
+        os.makedirs(incdir)
+        self.write_file(os.path.join(path, "incl.rdl"), "reg my_reg { field {} a; };")
+        self.write_file(
+            os.path.join(path, "top.rdl"),
+            '`include "incl.rdl"\naddrmap top { my_reg r1; };\n'
+        )
+        output = os.path.join(path, "out.txt")
+
+        def dump():
+            self.run_commandline([
+                'dump', os.path.join(path, "top.rdl"), "-F", "-I", incdir,
+                "-o", output, "--incremental",
+            ])
+            with open(output, encoding="utf-8") as f:
+                return f.read()
+
+        self.assertEqual(dump(), "0x0-0x3: top.r1\n\t[0:0] a\n")
+
+        # A new file that is found first in the search path is picked up
+        self.write_file(os.path.join(incdir, "incl.rdl"), "reg my_reg { field {} b; };")
+        self.assertEqual(dump(), "0x0-0x3: top.r1\n\t[0:0] b\n")
+
+    def test_incremental_perl(self):
+        path = self.get_output_dir()
+        self.write_file(
+            os.path.join(path, "top.rdl"),
+            "addrmap top { reg { field {} a; } r<%=1%>; };\n"
+        )
+        output = os.path.join(path, "out.txt")
+        if os.path.exists(output):
+            os.remove(output)
+
+        def dump():
+            mtime = os.stat(output).st_mtime_ns if os.path.exists(output) else None
+            self.run_commandline([
+                'dump', os.path.join(path, "top.rdl"), "-o", output, "--incremental",
+            ])
+            return os.stat(output).st_mtime_ns != mtime
+
+        # Perl snippets can depend on anything, so the command always runs
+        self.assertTrue(dump())
+        self.assertTrue(dump())
+
+    def test_incremental_cfg_plugin(self):
+        path = self.get_output_dir()
+        module_path = os.path.join(path, "incremental_exporter.py")
+        self.write_file(module_path, "\n".join([
+            "from peakrdl.plugins.exporter import ExporterSubcommandPlugin",
+            "class LocalExporter(ExporterSubcommandPlugin):",
+            "    short_desc = 'local exporter'",
+            "    def do_export(self, top_node, options):",
+            "        with open(options.output, 'w', encoding='utf-8') as f:",
+            "            f.write(top_node.inst_name)",
+            "",
+        ]))
+        cfg_path = os.path.join(path, "peakrdl.toml")
+        self.write_file(cfg_path, "\n".join([
+            "[peakrdl]",
+            'python_search_paths = ["."]',
+            'plugins.exporters.local = "incremental_exporter:LocalExporter"',
+            "",
+        ]))
+        output = os.path.join(path, "out.txt")
+        if os.path.exists(output):
+            os.remove(output)
+
+        def export():
+            mtime = os.stat(output).st_mtime_ns if os.path.exists(output) else None
+            self.run_commandline([
+                "--peakrdl-cfg", cfg_path,
+                'local', os.path.join(self.testdata_dir, "structural.rdl"),
+                "-o", output, "--incremental",
+            ])
+            return os.stat(output).st_mtime_ns != mtime
+
+        self.addCleanup(sys.modules.pop, "incremental_exporter", None)
+        self.assertTrue(export())
+        self.assertFalse(export())
+
+        # Editing the plugin's module is a change
+        with open(module_path, "a", encoding="utf-8") as f:
+            f.write("# edited\n")
+        self.assertTrue(export())
+
+    def test_importer_selection_cache(self):
+        from peakrdl.importer import Importer
+        args = [
+            "--peakrdl-cfg", os.path.join(self.testdata_dir, "peakrdl.toml"),
+            "dump", os.path.join(self.testdata_dir, "structural.xml"),
+        ]
+        original = Importer.is_compatible_contents
+        with patch.object(Importer, "is_compatible_contents", autospec=True, side_effect=original) as mock:
+            self.run_commandline(args)
+            expected = self.capsys.readouterr().out
+            self.assertTrue(expected.startswith("0x0000-0x0003: regblock__regblock_mmap.regblock.r0\n"))
+            call_count = mock.call_count
+            self.assertGreater(call_count, 0)
+
+            # Importer is not checked again while the file is unchanged
+            self.run_commandline(args)
+            self.assertEqual(self.capsys.readouterr().out, expected)
+            self.assertEqual(mock.call_count, call_count)
+            self.assertEqual(len(self.get_cache_entries("importer_selection")), 1)
+
+    def test_preprocess_cache(self):
+        path = self.get_output_dir()
+        self.write_file(os.path.join(path, "incl.rdl"), "reg my_reg { field {} a; };")
+        self.write_file(
+            os.path.join(path, "top.rdl"),
+            '`include "incl.rdl"\naddrmap top {\n my_reg r1;\n`ifdef FOO\n my_reg r2;\n`endif\n};\n'
+        )
+
+        self.run_commandline([
+            "preprocess", os.path.join(path, "top.rdl"), "-D", "FOO",
+            "-o", os.path.join(path, "out.rdl"),
+        ])
+        self.assertEqual(len(self.get_cache_entries("preprocessed")), 1)
+
+        # Preprocessing with the same defines reuses the cached result
+        os.remove(os.path.join(path, "out.rdl"))
+        with patch("systemrdl.RDLCompiler.preprocess_file") as mock:
+            self.run_commandline([
+                "preprocess", os.path.join(path, "top.rdl"), "-D", "FOO",
+                "-o", os.path.join(path, "out.rdl"),
+            ])
+            mock.assert_not_called()
+        with open(os.path.join(path, "out.rdl"), encoding="utf-8") as f:
+            self.assertIn("r2", f.read())
+
+        self.run_commandline([
+            "preprocess", os.path.join(path, "top.rdl"),
+            "-o", os.path.join(path, "out.rdl"),
+        ])
+        self.assertEqual(len(self.get_cache_entries("preprocessed")), 2)
+
+        with self.subTest("include changed"):
+            self.write_file(os.path.join(path, "incl.rdl"), "reg my_reg { field {} a; }; reg other { field {} b; };")
+            self.run_commandline([
+                "preprocess", os.path.join(path, "top.rdl"),
+                "-o", os.path.join(path, "out.rdl"),
+            ])
+            with open(os.path.join(path, "out.rdl"), encoding="utf-8") as f:
+                self.assertIn("reg other", f.read())
@@ -1,4 +1,8 @@
 import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from peakrdl.config import loader, schema
 from unittest_utils import PeakRDLTestcase
 
 class TestBasics(PeakRDLTestcase):
@@ -73,3 +77,79 @@ class TestBasics(PeakRDLTestcase):
                 '--peakrdl-cfg', os.path.join(self.testdata_dir, "bad_plugin.toml"),
                 "--plugins"
             ], expects_error=True)
+
+    def test_lazy_plugin_import(self):
+        cfg_path = os.path.join(self.testdata_dir, "lazy_plugin.toml")
+        with self.subTest("unrelated subcommand"):
+            # Plugins from the config are not imported unless they are used
+            self.run_commandline([
+                '--peakrdl-cfg', cfg_path,
+                "dump", os.path.join(self.testdata_dir, "structural.rdl"),
+            ])
+
+        with self.subTest("broken plugin"):
+            self.capsys.readouterr()
+            self.run_commandline([
+                '--peakrdl-cfg', cfg_path,
+                "broken", os.path.join(self.testdata_dir, "structural.rdl"),
+            ], expects_error=True)
+            captured = self.capsys.readouterr()
+            self.assertIn(f"{cfg_path}: error: peakrdl.plugins.exporters.broken:", captured.out)
+            self.assertIn("dne_module", captured.out)
+
+    def test_lazy_importer_import(self):
+        cfg_path = os.path.join(self.get_output_dir(), "peakrdl.toml")
+        with open(cfg_path, "w", encoding="utf-8") as f:
+            f.write('[peakrdl]\nplugins.importers.broken = "dne_module:DummyImporter"\n')
+        rdl_path = os.path.join(self.testdata_dir, "structural.rdl")
+
+        with self.subTest("subcommand without importers"):
+            self.run_commandline([
+                '--peakrdl-cfg', cfg_path,
+                "preprocess", rdl_path, "-o", os.path.join(self.get_output_dir(), "out.rdl"),
+            ])
+
+        with self.subTest("subcommand with importers"):
+            self.capsys.readouterr()
+            self.run_commandline([
+                '--peakrdl-cfg', cfg_path, "dump", rdl_path,
+            ], expects_error=True)
+            self.assertIn("dne_module", self.capsys.readouterr().out)
+
+    def test_cfg_snapshot(self):
+        cfg_path = os.path.join(self.get_output_dir(), "peakrdl.toml")
+        with open(cfg_path, "w", encoding="utf-8") as f:
+            f.write('[my_plugin]\nout_dir = "."\n')
+        sch = schema.normalize({"out_dir": schema.DirectoryPath()})
+
+        cfg = loader.load_cfg(cfg_path)
+        first = cfg.get_namespace("my_plugin", sch)
+
+        with self.subTest("cached"):
+            # Neither the TOML file nor the paths in it are checked again
+            with patch.object(loader.tomllib, "loads", side_effect=AssertionError), \
+                    patch.object(schema.DirectoryPath, "extract", side_effect=AssertionError):
+                cfg = loader.load_cfg(cfg_path)
+                self.assertEqual(cfg.get_namespace("my_plugin", sch), first)
+
+        with self.subTest("different schema"):
+            with patch.object(schema.DirectoryPath, "extract", return_value="other") as extract:
+                cfg.get_namespace("my_plugin", schema.normalize({"out_dir": schema.DirectoryPath(shall_exist=False)}))
+                self.assertEqual(extract.call_count, 1)
+
+        with self.subTest("different plugin version"):
+            plugin_v1 = SimpleNamespace(dist_name="my-plugin", dist_version="1.0")
+            plugin_v2 = SimpleNamespace(dist_name="my-plugin", dist_version="2.0")
+            cfg.get_namespace("my_plugin", sch, plugin_v1)
+            with patch.object(schema.DirectoryPath, "extract", side_effect=AssertionError):
+                cfg.get_namespace("my_plugin", sch, plugin_v1)
+            with patch.object(schema.DirectoryPath, "extract", return_value="other") as extract:
+                self.assertEqual(cfg.get_namespace("my_plugin", sch, plugin_v2), {"out_dir": "other"})
+                self.assertEqual(extract.call_count, 1)
+
+        with self.subTest("modified"):
+            with open(cfg_path, "a", encoding="utf-8") as f:
+                f.write('extra = 1\n')
+            cfg = loader.load_cfg(cfg_path)
+            self.assertEqual(cfg.raw_data["my_plugin"]["extra"], 1)
+
@@ -160,3 +160,21 @@ class TestSchema(unittest.TestCase):
             raw_data = "sys:ClassDNE"
             with self.assertRaises(schema.SchemaException):
                 sch.extract(raw_data, __file__, "testcase")
+
+    def test_py_lazy(self):
+        sch = schema.PythonObjectImport(lazy=True)
+
+        with self.subTest("syntax"):
+            raw_data = "bad import spec"
+            with self.assertRaises(schema.SchemaException):
+                sch.extract(raw_data, __file__, "testcase")
+
+        with self.subTest("module dne"):
+            handle = sch.extract("dne_module:ClassName", __file__, "testcase")
+            self.assertEqual(handle.value, "dne_module:ClassName")
+            with self.assertRaisesRegex(schema.SchemaException, "^testcase: "):
+                handle.load()
+
+        with self.subTest("ok"):
+            handle = sch.extract("os.path:join", __file__, "testcase")
+            self.assertIs(handle.load(), os.path.join)
@@ -1,6 +1,23 @@
 import os
+import io
+import csv
+import ast
+import json
+import pstats
+import shutil
+import struct
+import sys
+import time
+import socket
+import tempfile
+import threading
+import unittest
+import subprocess
+from unittest.mock import patch
 from unittest_utils import PeakRDLTestcase
 
+from peakrdl import client
+
 class TestCoreCommands(PeakRDLTestcase):
 
     def test_dump(self):
@@ -163,3 +180,417 @@ class TestCoreCommands(PeakRDLTestcase):
             os.path.join(self.testdata_dir, "structural.rdl"),
             '-o', os.path.join(path, "pp.sv"),
         ])
+
+    def test_preprocess_batch(self):
+        path = self.get_output_dir()
+        inputs = [
+            os.path.join(self.testdata_dir, "structural.rdl"),
+            os.path.join(self.testdata_dir, "parameters.rdl"),
+        ]
+
+        with self.subTest("directory"):
+            self.run_commandline(['preprocess', *inputs, '-o', os.path.join(path, "out"), "-j", "2"])
+            self.assertTrue(os.path.isfile(os.path.join(path, "out", "structural.rdl")))
+            self.assertTrue(os.path.isfile(os.path.join(path, "out", "parameters.rdl")))
+
+        with self.subTest("template"):
+            self.run_commandline(['preprocess', *inputs, '-o', os.path.join(path, "{stem}_pp.sv")])
+            with open(os.path.join(path, "structural_pp.sv"), encoding="utf-8") as f:
+                with open(os.path.join(path, "out", "structural.rdl"), encoding="utf-8") as f2:
+                    self.assertEqual(f.read(), f2.read())
+            self.assertTrue(os.path.isfile(os.path.join(path, "parameters_pp.sv")))
+
+        with self.subTest("template with other braces"):
+            self.run_commandline(['preprocess', *inputs, '-o', os.path.join(path, "{stem}.{x}{.rdl")])
+            self.assertTrue(os.path.isfile(os.path.join(path, "structural.{x}{.rdl")))
+            self.assertTrue(os.path.isfile(os.path.join(path, "parameters.{x}{.rdl")))
+
+        with self.subTest("conflict"):
+            self.run_commandline(['preprocess', inputs[0], inputs[0], '-o', path], expects_error=True)
+
+    def test_multi(self):
+        path = self.get_output_dir()
+        self.run_commandline([
+            'multi',
+            os.path.join(self.testdata_dir, "structural.rdl"),
+            "--export", "dump",
+            "--export", "dump -F",
+            "--export", f"ip-xact -o {os.path.join(path, 'structural.xml')}",
+        ])
+        captured = self.capsys.readouterr()
+        self.assertEqual(captured.out.count("0x0000-0x0003: regblock.r0\n"), 2)
+        self.assertEqual(captured.out.count("\t[7:0] a\n"), 3)
+        self.assertTrue(os.path.isfile(os.path.join(path, "structural.xml")))
+
+    def test_multi_parallel(self):
+        path = self.get_output_dir()
+        self.run_commandline([
+            'multi',
+            os.path.join(self.testdata_dir, "structural.rdl"),
+            "--export", f"ip-xact -o {os.path.join(path, 'structural.xml')}",
+            "--export", f"c-header -o {os.path.join(path, 'structural.h')}",
+            "-j", "2",
+        ])
+        self.assertTrue(os.path.isfile(os.path.join(path, "structural.xml")))
+        self.assertTrue(os.path.isfile(os.path.join(path, "structural.h")))
+
+    def test_multi_errors(self):
+        for spec in ["", "dne", "globals", "lookup", "ip-xact"]:
+            with self.subTest(spec):
+                self.run_commandline([
+                    'multi',
+                    os.path.join(self.testdata_dir, "structural.rdl"),
+                    "--export", spec,
+                ], expects_error=True)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork()")
+    def test_batch(self):
+        path = self.get_output_dir()
+        rdl_path = os.path.join(self.testdata_dir, "structural.rdl")
+        manifest_path = os.path.join(path, "jobs.toml")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            f.write(f"""
+                [[jobs]]
+                name = "xml"
+                args = ["ip-xact", {rdl_path!r}, "-o", "structural.xml"]
+                cwd = "."
+
+                [[jobs]]
+                name = "import"
+                args = ["dump", "structural.xml"]
+                cwd = "."
+                depends_on = ["xml"]
+
+                [[jobs]]
+                name = "broken"
+                args = ["dump", "dne.rdl"]
+
+                [[jobs]]
+                name = "after broken"
+                args = ["dump", {rdl_path!r}]
+                depends_on = ["broken"]
+            """)
+        log_dir = os.path.join(path, "logs")
+        self.run_commandline(['batch', manifest_path, '-j', '2', '--log-dir', log_dir], expects_error=True)
+
+        status = {}
+        for line in self.capsys.readouterr().out.splitlines()[:-1]:
+            job_status, name = line.split(" (")[0].split(None, 1)
+            status[name] = job_status
+        self.assertEqual(status, {"xml": "ok", "import": "ok", "broken": "failed", "after broken": "skipped"})
+
+        self.assertTrue(os.path.isfile(os.path.join(path, "structural.xml")))
+        with open(os.path.join(log_dir, "import.log"), encoding="utf-8") as f:
+            self.assertIn("regblock.r0\n", f.read())
+        self.assertFalse(os.path.exists(os.path.join(log_dir, "after_broken.log")))
+
+    def test_batch_errors(self):
+        path = self.get_output_dir()
+        manifests = {
+            "cycle": '[[jobs]]\nname="a"\nargs=["dump"]\ndepends_on=["b"]\n[[jobs]]\nname="b"\nargs=["dump"]\ndepends_on=["a"]\n',
+            "unknown dep": '[[jobs]]\nargs=["dump"]\ndepends_on=["b"]\n',
+            "duplicate": '[[jobs]]\nname="a"\nargs=["dump"]\n[[jobs]]\nname="a"\nargs=["dump"]\n',
+            "no args": '[[jobs]]\nname="a"\n',
+        }
+        for name, contents in manifests.items():
+            with self.subTest(name):
+                manifest_path = os.path.join(path, name.replace(" ", "_") + ".toml")
+                with open(manifest_path, "w", encoding="utf-8") as f:
+                    f.write(contents)
+                self.run_commandline(['batch', manifest_path], expects_error=True)
+        self.assertIn("circular job dependency: a -> b -> a", self.capsys.readouterr().err)
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX") and hasattr(os, "fork"), "requires UNIX sockets and fork()")
+    def test_serve(self):
+        # Paths of UNIX sockets are limited to about 100 characters, which the
+        # test output directory could exceed
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir, ignore_errors=True)
+        socket_path = os.path.join(socket_dir, "peakrdl.sock")
+        log_path = os.path.join(self.get_output_dir(), "server.log")
+        with open(log_path, "w", encoding="utf-8") as log:
+            server = subprocess.Popen(
+                [sys.executable, "-m", "peakrdl", "serve", "--socket", socket_path],
+                stderr=log,
+            )
+        try:
+            for _ in range(100):
+                if os.path.exists(socket_path) or server.poll() is not None:
+                    break
+                time.sleep(0.1)
+            if not os.path.exists(socket_path):
+                with open(log_path, encoding="utf-8") as f:
+                    self.fail("Server did not start:\n" + f.read())
+
+            # Only the owner can connect
+            self.assertEqual(os.stat(socket_path).st_mode & 0o777, 0o600)
+
+            env = dict(os.environ, PEAKRDL_SERVER=socket_path)
+            result = subprocess.run(
+                [sys.executable, "-m", "peakrdl", "dump", os.path.join(self.testdata_dir, "structural.rdl")],
+                stdout=subprocess.PIPE, universal_newlines=True, env=env, check=True
+            )
+            self.assertTrue(result.stdout.startswith("0x0000-0x0003: regblock.r0\n"))
+
+            # Exit codes of failing commands are forwarded
+            result = subprocess.run(
+                [sys.executable, "-m", "peakrdl", "dump", "does_not_exist.rdl"],
+                stderr=subprocess.PIPE, universal_newlines=True, env=env, check=False
+            )
+            self.assertEqual(result.returncode, 1)
+        finally:
+            server.terminate()
+            server.wait()
+        self.assertFalse(os.path.exists(socket_path))
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires UNIX sockets")
+    def test_serve_lost_connection(self):
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir, ignore_errors=True)
+        socket_path = os.path.join(socket_dir, "peakrdl.sock")
+
+        # Server that drops the connection without replying, as if the worker
+        # that handled the request crashed
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(server.close)
+        server.bind(socket_path)
+        server.listen(1)
+        def drop_request():
+            conn, _ = server.accept()
+            with conn:
+                _, fds = client.recv_request(conn)
+                for fd in fds:
+                    os.close(fd)
+        thread = threading.Thread(target=drop_request)
+        thread.start()
+
+        self.assertEqual(client.forward(socket_path, ["dump", "top.rdl"]), 1)
+        thread.join()
+        self.assertIn("lost connection to server", self.capsys.readouterr().err)
+
+        # Nothing was sent if the server is not reachable
+        server.close()
+        os.remove(socket_path)
+        self.assertIsNone(client.forward(socket_path, ["dump", "top.rdl"]))
+
+    def test_compile_jobs(self):
+        path = self.get_output_dir()
+        files = {
+            "blk_a.rdl": "enum e_t { A = 0; B = 1; };\n"
+                "addrmap blk_a { reg { field { encode = e_t; } f[2] = 1; } x[4]; };\n",
+            # Declares a UDP, so it cannot be compiled by a worker
+            "blk_b.rdl": "property my_udp { type = longint; component = reg; };\n"
+                "addrmap blk_b { reg { my_udp = 5; field {} f; } x; };\n",
+            "blk_c.rdl": "addrmap blk_c { reg { field {} f; } x; };\n",
+            # Depends on the other files, so it cannot be compiled by a worker
+            "top.rdl": "addrmap top { blk_a a; blk_b b; blk_c c; };\n",
+        }
+        for name, contents in files.items():
+            with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+                f.write(contents)
+        args = ["dump", "-F"] + [os.path.join(path, name) for name in files]
+
+        with patch.dict(os.environ, {"PEAKRDL_NO_CACHE": "1"}):
+            self.run_commandline(args)
+            expected = self.capsys.readouterr().out
+            self.run_commandline(args + ["--compile-jobs", "3"])
+            self.assertEqual(self.capsys.readouterr().out, expected)
+            self.assertTrue(expected.startswith("0x00-0x0f: top.a.x[4]\n"))
+
+            # Conflicting declarations are still reported
+            self.run_commandline([
+                "dump", "--compile-jobs", "2",
+                os.path.join(path, "blk_c.rdl"), os.path.join(path, "blk_c.rdl"),
+            ], expects_error=True)
+            self.assertIn("Multiple declarations of type 'blk_c'", self.capsys.readouterr().err)
+
+    def test_timing(self):
+        path = self.get_output_dir()
+        trace_path = os.path.join(path, "trace.json")
+        profile_path = os.path.join(path, "dump.prof")
+        with patch.dict(os.environ, {"PEAKRDL_NO_CACHE": "1"}):
+            self.run_commandline([
+                "--timing", "--profile", profile_path,
+                'dump', os.path.join(self.testdata_dir, "structural.rdl"),
+                "--timing-trace", trace_path,
+            ])
+        captured = self.capsys.readouterr()
+        self.assertTrue(captured.out.startswith("0x0000-0x0003: regblock.r0\n"))
+        phases = [line.split()[0] for line in captured.err.splitlines()[1:]]
+        for expected in ["argfile", "config", "dump", "compile", "load", "elaborate", "export"]:
+            self.assertIn(expected, phases)
+
+        with open(trace_path, encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+        self.assertIn("elaborate", [event["name"] for event in events])
+
+        stats = pstats.Stats(profile_path)
+        self.assertGreater(stats.total_calls, 0)
+
+    def test_timing_option_equals(self):
+        path = self.get_output_dir()
+        trace_path = os.path.join(path, "trace.json")
+        profile_path = os.path.join(path, "dump.prof")
+        for p in (trace_path, profile_path):
+            if os.path.exists(p):
+                os.remove(p)
+        self.run_commandline([
+            f"--profile={profile_path}",
+            'dump', os.path.join(self.testdata_dir, "structural.rdl"),
+            f"--timing-trace={trace_path}",
+        ])
+        self.assertTrue(self.capsys.readouterr().out.startswith("0x0000-0x0003: regblock.r0\n"))
+        self.assertTrue(os.path.exists(trace_path))
+        self.assertGreater(pstats.Stats(profile_path).total_calls, 0)
+
+    def test_option_arg(self):
+        from peakrdl.main import get_option_arg, get_subcommand_arg
+        self.assertEqual(get_option_arg(["dump", "--profile", "a.prof"], "--profile"), "a.prof")
+        self.assertEqual(get_option_arg(["dump", "--profile=a.prof"], "--profile"), "a.prof")
+        self.assertEqual(get_option_arg(["dump", "--profile-other=a"], "--profile"), None)
+        self.assertEqual(get_subcommand_arg(["--peakrdl-cfg", "x.toml", "dump"]), "dump")
+        self.assertEqual(get_subcommand_arg(["--peakrdl-cfg=x.toml", "dump"]), "dump")
+        self.assertEqual(get_subcommand_arg(["--profile=dump.prof", "lookup", "--profile", "x"]), "lookup")
+
+    def test_depfile(self):
+        path = self.get_output_dir()
+        rdl_path = os.path.join(self.testdata_dir, "structural.rdl")
+        cfg_path = os.path.join(self.testdata_dir, "peakrdl.toml")
+        out_path = os.path.join(path, "out.h")
+        argfile_path = os.path.join(path, "args.f")
+        with open(argfile_path, "w", encoding="utf-8") as f:
+            f.write(f"c-header {rdl_path} -o {out_path}")
+
+        self.run_commandline([
+            "-f", argfile_path,
+            "--peakrdl-cfg", cfg_path,
+            "--depfile", os.path.join(path, "out.d"),
+        ])
+        with open(os.path.join(path, "out.d"), encoding="utf-8") as f:
+            self.assertEqual(
+                f.read(),
+                f"{out_path}: \\\n {argfile_path} \\\n {cfg_path} \\\n {rdl_path}\n"
+            )
+
+    def test_depfile_preprocess(self):
+        path = self.get_output_dir()
+        with open(os.path.join(path, "incl.rdl"), "w", encoding="utf-8") as f:
+            f.write("reg my_reg { field {} a; };")
+        with open(os.path.join(path, "top.rdl"), "w", encoding="utf-8") as f:
+            f.write('`include "incl.rdl"\naddrmap top { my_reg r1; };\n')
+
+        self.run_commandline([
+            "preprocess", os.path.join(path, "top.rdl"),
+            "-o", os.path.join(path, "out dir.rdl"),
+            "--depfile", os.path.join(path, "out.d"),
+        ])
+        with open(os.path.join(path, "out.d"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "".join([
+                os.path.join(path, "out dir.rdl").replace(" ", "\\ "), ": \\\n",
+                " ", os.path.join(path, "top.rdl"), " \\\n",
+                " ", os.path.join(path, "incl.rdl"), "\n",
+            ]))
+
+        with self.subTest("--depfile=PATH"):
+            os.remove(os.path.join(path, "out.d"))
+            self.run_commandline([
+                "preprocess", os.path.join(path, "top.rdl"),
+                "-o", os.path.join(path, "out dir.rdl"),
+                "--depfile=" + os.path.join(path, "out.d"),
+            ])
+            self.assertTrue(os.path.exists(os.path.join(path, "out.d")))
+
+    def test_dump_output(self):
+        args = ['dump', os.path.join(self.testdata_dir, "structural.rdl"), "-u", "-F"]
+        self.run_commandline(args)
+        expected = self.capsys.readouterr().out
+
+        output = os.path.join(self.get_output_dir(), "dump.txt")
+        self.run_commandline(args + ["-o", output])
+        self.assertEqual(self.capsys.readouterr().out, "")
+        with open(output, encoding="utf-8") as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_dump_formats(self):
+        rdl_path = os.path.join(self.testdata_dir, "structural.rdl")
+
+        with self.subTest("jsonl"):
+            self.run_commandline(['dump', rdl_path, "-F", "--format", "jsonl"])
+            rows = [json.loads(line) for line in self.capsys.readouterr().out.splitlines()]
+            self.assertEqual(rows[0], {
+                "type": "reg", "path": "regblock.r0", "address": 0, "size": 4,
+                "dims": None, "sw": "rw",
+            })
+            self.assertEqual(rows[1], {
+                "type": "field", "path": "regblock.r0.a", "address": 0,
+                "msb": 7, "lsb": 0, "sw": "rw",
+            })
+            self.assertIn({
+                "type": "reg", "path": "regblock.r1[2][3][4]", "address": 0x10, "size": 0x60,
+                "dims": [2, 3, 4], "sw": "rw",
+            }, rows)
+
+        with self.subTest("csv"):
+            self.run_commandline(['dump', rdl_path, "-u", "--format", "csv"])
+            rows = list(csv.DictReader(io.StringIO(self.capsys.readouterr().out)))
+            self.assertEqual(len(rows), 61)
+            self.assertEqual(rows[1], {
+                "type": "reg", "path": "regblock.r1[0][0][0]", "address": "16", "size": "4",
+                "dims": "", "msb": "", "lsb": "", "sw": "rw",
+            })
+
+        def read_npy(*args):
+            output = os.path.join(self.get_output_dir(), "dump.npy")
+            self.run_commandline(['dump', rdl_path, *args, "--format", "npy", "-o", output])
+            with open(output, "rb") as f:
+                data = f.read()
+            self.assertEqual(data[:8], b"\x93NUMPY\x01\x00")
+            header_len = struct.unpack("<H", data[8:10])[0]
+            header = ast.literal_eval(data[10:10 + header_len].decode("latin1"))
+            self.assertEqual((10 + header_len) % 64, 0)
+            descr = dict(header["descr"])
+            self.assertEqual(
+                list(descr.keys()),
+                ["path", "type", "address", "size", "dims", "msb", "lsb", "sw"]
+            )
+            record = struct.Struct(f"<{descr['path'][2:]}sBQQ{descr['dims'][2:]}shh3s")
+            self.assertEqual(len(data), 10 + header_len + header["shape"][0] * record.size)
+            return [
+                tuple(v.rstrip(b"\0") if isinstance(v, bytes) else v for v in row)
+                for row in record.iter_unpack(data[10 + header_len:])
+            ]
+
+        with self.subTest("npy"):
+            rows = read_npy("-u", "-F")
+            self.assertEqual(rows[1], (b"regblock.r0.a", 1, 0, 0, b"", 7, 0, b"rw"))
+
+        with self.subTest("npy dims"):
+            rows = read_npy()
+            self.assertEqual(rows[1], (b"regblock.r1[2][3][4]", 0, 16, 96, b"2x3x4", -1, -1, b"rw"))
+            self.assertEqual(rows[3][4], b"4")
+
+    def test_lookup(self):
+        rdl_path = os.path.join(self.testdata_dir, "structural.rdl")
+        expected = "\n".join([
+            "0x0000: regblock.r0",
+            "0x0002: regblock.r0+0x2",
+            "0x0014: regblock.r1[0][0][1]",
+            "0x206a: regblock.sub2[1].sub[1].r2[1]+0x2",
+            "0x2110: (unmapped)",
+            "0x0000: regblock.r0",
+            "",
+        ])
+
+        address_file = os.path.join(self.get_output_dir(), "addresses.txt")
+        with open(address_file, "w", encoding="utf-8") as f:
+            f.write("0x206a 0x2110\n0\n")
+
+        # Second run uses the cached index
+        for _ in range(2):
+            self.run_commandline([
+                "lookup", rdl_path, "-a", "0", "-a", "2", "-a", "0x14",
+                "--address-file", address_file,
+            ])
+            self.assertEqual(self.capsys.readouterr().out, expected)
+
+        self.run_commandline(["lookup", rdl_path, "-a", "foo"], expects_error=True)
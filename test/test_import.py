@@ -27,6 +27,20 @@ class TestImporters(PeakRDLTestcase):
         ])
         self.assertEqual(captured.out, expected)
 
+    def test_parallel_import(self):
+        args = [
+            'dump',
+            os.path.join(self.testdata_dir, "structural.rdl"),
+            os.path.join(self.testdata_dir, "structural.xml"),
+        ]
+        for top in ["regblock", "regblock__regblock_mmap__regblock"]:
+            with self.subTest(top):
+                self.run_commandline(args + ["--top", top, "--rename", "regblock"])
+                expected = self.capsys.readouterr().out
+                self.run_commandline(args + ["--top", top, "--rename", "regblock", "--compile-jobs", "2"])
+                self.assertEqual(self.capsys.readouterr().out, expected)
+                self.assertTrue(expected.startswith("0x0000-0x0003: regblock.r0\n"))
+
     def test_bad_type(self):
         self.run_commandline([
             'dump',
@@ -4,6 +4,9 @@ import os
 
 import pytest
 
+# Keep any cached data out of the user's home directory
+os.environ["PEAKRDL_CACHE_DIR"] = os.path.join(os.path.dirname(__file__), "test.out", "cache")
+
 class PeakRDLTestcase(unittest.TestCase):
     this_dir = os.path.dirname(__file__)
     testdata_dir = os.path.join(this_dir, "testdata")